@@ -0,0 +1,45 @@
+"""Представление постов и комментариев в JSON с выбором полей."""
+
+
+class FieldsError(ValueError):
+    pass
+
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'image': lambda post: post.image.url if post.image else None,
+    'comments_count': lambda post: post.comments_count,
+}
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'post': lambda comment: comment.post_id,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created.isoformat(),
+}
+
+FOLLOW_FIELDS = {
+    'author': lambda follow: follow.author.username,
+}
+
+
+def parse_fields(request, available):
+    """Поля из параметра ``fields`` через запятую, по умолчанию все."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = set(fields) - available.keys()
+    if unknown:
+        raise FieldsError(
+            f'Неизвестные поля: {", ".join(sorted(unknown))}'
+        )
+    return fields
+
+
+def serialize(obj, fields, available):
+    return {field: available[field](obj) for field in fields}
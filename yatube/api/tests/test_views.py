@@ -0,0 +1,217 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.tasks import run_pending
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import NEXT, encode_cursor
+from posts.tests.utils import OnCommitMixin
+from posts.views import NUMBER_OF_POSTS
+
+User = get_user_model()
+
+
+class ApiTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'Пост {number}')
+            for number in range(NUMBER_OF_POSTS + 3)
+        )
+        cls.post = Post.objects.latest('pk')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_endpoints(self):
+        """Ленты и пост отдаются в JSON."""
+        urls = {
+            reverse('api:index'): self.client,
+            reverse('api:group_posts', kwargs={'slug': self.group.slug}):
+                self.client,
+            reverse(
+                'api:profile', kwargs={'username': self.author.username}
+            ): self.client,
+            reverse('api:follow_index'): self.reader_client,
+        }
+        for url, client in urls.items():
+            with self.subTest(url=url):
+                data = client.get(url).json()
+                self.assertEqual(len(data['results']), NUMBER_OF_POSTS)
+                self.assertEqual(data['results'][0]['id'], self.post.pk)
+        data = self.client.get(
+            reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+        ).json()
+        self.assertEqual(data['author'], self.author.username)
+        self.assertEqual(data['group'], self.group.slug)
+
+    def test_cursor_pagination(self):
+        """Следующая страница доступна по ссылке next."""
+        data = self.client.get(
+            reverse('api:index'), {'fields': 'id'}
+        ).json()
+        data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNone(data['next'])
+        self.assertEqual(set(data['results'][0]), {'id'})
+
+    def test_malformed_cursor(self):
+        """Курсор с ключами не того типа отдаёт первую страницу."""
+        response = self.client.get(
+            reverse('api:index'),
+            {'cursor': encode_cursor(NEXT, ['garbage', 'x'])},
+        )
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['results'][0]['id'], self.post.pk)
+        self.assertIsNone(data['previous'])
+
+    def test_sparse_fields(self):
+        """Клиент выбирает поля, неизвестное поле - ошибка 400."""
+        response = self.client.get(
+            reverse('api:index'), {'fields': 'id,text'}
+        )
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'text'}
+        )
+        response = self.client.get(reverse('api:index'), {'fields': 'pk'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_not_modified_without_queries(self):
+        """Неизменившаяся лента отдаётся ответом 304 без запросов к БД."""
+        url = reverse('api:index')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            not_modified = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_etag_changes_with_content(self):
+        """Новый пост и новый комментарий меняют ETag: число
+        комментариев отдаётся и в лентах."""
+        post_url = reverse('api:post_detail', kwargs={'post_id': self.post.pk})
+
+        def new_post():
+            Post.objects.create(author=self.author, text='Новый')
+
+        def new_comment():
+            Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'
+            )
+
+        for url, client, change in (
+            (reverse('api:index'), self.client, new_post),
+            (post_url, self.client, new_comment),
+            (reverse('api:index'), self.client, new_comment),
+            (reverse('api:follow_index'), self.reader_client, new_comment),
+        ):
+            with self.subTest(url=url, change=change.__name__):
+                etag = client.get(url)['ETag']
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_follow_feed_personal(self):
+        """Лента подписок требует входа и меняется при отписке."""
+        url = reverse('api:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        response = self.reader_client.get(url)
+        self.assertIn('private', response['Cache-Control'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Follow.objects.filter(user=self.reader).delete()
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.json()['results'], [])
+
+    @override_settings(TASKS_EAGER=False)
+    def test_follow_feed_changes_after_fan_out(self):
+        """ETag ленты подписок меняется, когда фоновая задача добавила
+        в неё новый пост."""
+        url = reverse('api:follow_index')
+        Post.objects.create(author=self.author, text='Отложенный')
+        etag = self.reader_client.get(url)['ETag']
+        run_pending()
+        response = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'], 'Отложенный')
+
+    def test_missing_objects(self):
+        """Отсутствующие группа и пост - ошибка 404 в JSON."""
+        for url in (
+            reverse('api:group_posts', kwargs={'slug': 'missing'}),
+            reverse('api:post_detail', kwargs={'post_id': 0}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404)
+                self.assertIn('detail', response.json())
+
+    def test_payload_smaller_than_html(self):
+        """Ответ API в разы меньше HTML-страницы."""
+        api = self.client.get(reverse('api:index'))
+        html = self.client.get(reverse('posts:index'))
+        self.assertLess(len(api.content) * 3, len(html.content))
+
+
+class FollowApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        for name in ('first', 'second'):
+            User.objects.create_user(username=name)
+        cls.url = reverse('api:following')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def post(self, data, client=None):
+        return (client or self.reader_client).post(
+            self.url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_batch_follow(self):
+        """Пакетная подписка отвечает итоговым состоянием подписок."""
+        data = self.post(
+            {'follow': ['first', 'second', 'reader', 'nobody']}
+        ).json()
+        self.assertEqual(data['following'], ['first', 'second'])
+        self.assertEqual(data['not_found'], ['nobody'])
+        data = self.post({'unfollow': ['second']}).json()
+        self.assertEqual(data['following'], [])
+        data = self.reader_client.get(self.url).json()
+        self.assertEqual(data['results'], [{'author': 'first'}])
+
+    def test_invalid_batch(self):
+        """Гость получает 401, ошибочное тело и пересечение списков -
+        400."""
+        self.assertEqual(self.post({}, client=Client()).status_code, 401)
+        for data in (
+            ['first'],
+            {'follow': 'first'},
+            {'follow': ['first'], 'unfollow': ['first']},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.post(data).status_code, 400)
@@ -0,0 +1,223 @@
+import json
+from functools import wraps
+
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_POST, require_safe
+
+from posts import querysets
+from posts.cache import (
+    listing_versions,
+    post_versions,
+    version_key,
+    versions_condition,
+)
+from posts.feed import FEED_CURSOR_KEYS
+from posts.models import Follow, Group, Post, User
+from posts.paginators import CURSOR_KEYS, CursorPaginator
+from posts.services import MAX_AUTHORS, change_following
+from posts.views import (
+    COMMENT_CURSOR_KEYS,
+    NUMBER_OF_COMMENTS,
+    NUMBER_OF_POSTS,
+)
+
+from .serializers import (
+    COMMENT_FIELDS,
+    FOLLOW_FIELDS,
+    POST_FIELDS,
+    FieldsError,
+    parse_fields,
+    serialize,
+)
+
+
+def endpoint(version_keys, personal=False):
+    """Представление API только для чтения с условными запросами.
+
+    ``version_keys(request, **kwargs)`` возвращает ключи версий кэша,
+    которые меняются вместе с ответом. Для ``personal`` ответ зависит
+    от пользователя и доступен только после входа.
+    """
+    def decorator(view):
+        conditional = versions_condition(version_keys, per_user=personal)(
+            view
+        )
+
+        @require_safe
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            if personal and not request.user.is_authenticated:
+                return error(401, 'Нужно войти в систему')
+            try:
+                response = conditional(request, **kwargs)
+            except Http404:
+                return error(404, 'Не найдено')
+            except FieldsError as exc:
+                return error(400, str(exc))
+            return response
+        return wrapper
+    return decorator
+
+
+def error(status, detail):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def _page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return f'{request.path}?{query.urlencode()}'
+
+
+def paginated(request, queryset, available, per_page=NUMBER_OF_POSTS,
+              keys=CURSOR_KEYS):
+    fields = parse_fields(request, available)
+    page = CursorPaginator(queryset, per_page, keys).get_page(
+        request.GET.get('cursor')
+    )
+    return JsonResponse({
+        'results': [serialize(obj, fields, available) for obj in page],
+        'next': _page_url(request, page.next_cursor),
+        'previous': _page_url(request, page.previous_cursor),
+    })
+
+
+def posts_keys(request, **kwargs):
+    """Посты в лентах API отдаются с числом комментариев, поэтому
+    ETag лент меняется и с любым комментарием."""
+    return [*listing_versions(request), version_key('comments')]
+
+
+def follow_keys(request):
+    return [
+        version_key('index'),
+        version_key('comments'),
+        version_key('feed'),
+        version_key('feed', request.user.pk),
+    ]
+
+
+def following_keys(request):
+    return [version_key('index'), version_key('follow', request.user.pk)]
+
+
+def comments_keys(request, post_id):
+    return [version_key('comments', post_id), version_key('index')]
+
+
+@endpoint(posts_keys)
+def index(request):
+    return paginated(request, querysets.index_posts(), POST_FIELDS)
+
+
+@endpoint(posts_keys)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return paginated(request, querysets.group_posts(group), POST_FIELDS)
+
+
+@endpoint(posts_keys)
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return paginated(request, querysets.author_posts(author), POST_FIELDS)
+
+
+@endpoint(follow_keys, personal=True)
+def follow_index(request):
+    return paginated(
+        request,
+        querysets.follow_posts(request.user),
+        POST_FIELDS,
+        keys=FEED_CURSOR_KEYS,
+    )
+
+
+@endpoint(post_versions)
+def post_detail(request, post_id):
+    fields = parse_fields(request, POST_FIELDS)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    return JsonResponse(serialize(post, fields, POST_FIELDS))
+
+
+@endpoint(comments_keys)
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    return paginated(
+        request,
+        querysets.post_comments(post),
+        COMMENT_FIELDS,
+        per_page=NUMBER_OF_COMMENTS,
+        keys=COMMENT_CURSOR_KEYS,
+    )
+
+
+@endpoint(following_keys, personal=True)
+def following_list(request):
+    return paginated(
+        request,
+        Follow.objects.filter(user=request.user).select_related('author'),
+        FOLLOW_FIELDS,
+        keys=('pk',),
+    )
+
+
+def _usernames(data, key):
+    names = data.get(key, [])
+    if not isinstance(names, list) or not all(
+        isinstance(name, str) for name in names
+    ):
+        raise ValueError(f'{key}: ожидается список имён авторов.')
+    return names
+
+
+@require_POST
+def follow_batch(request):
+    """Подписки и отписки пакетом из JSON ``{"follow": [...],
+    "unfollow": [...]}`` с именами авторов.
+
+    Отвечает, на кого из названных авторов пользователь подписан после
+    изменения, и какие имена не найдены.
+    """
+    if not request.user.is_authenticated:
+        return error(401, 'Нужно войти в систему')
+    try:
+        data = json.loads(request.body or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError('Ожидается объект JSON.')
+        follow = _usernames(data, 'follow')
+        unfollow = _usernames(data, 'unfollow')
+    except ValueError as exc:
+        return error(400, str(exc))
+    if len(follow) + len(unfollow) > MAX_AUTHORS:
+        return error(400, f'Не больше {MAX_AUTHORS} авторов за раз.')
+    authors = dict(
+        User.objects.filter(
+            username__in=follow + unfollow
+        ).values_list('username', 'pk')
+    )
+    try:
+        following = change_following(
+            request.user,
+            follow=[authors[name] for name in follow if name in authors],
+            unfollow=[authors[name] for name in unfollow if name in authors],
+        )
+    except ValueError as exc:
+        return error(400, str(exc))
+    return JsonResponse({
+        'following': sorted(
+            name for name, pk in authors.items() if pk in following
+        ),
+        'not_found': sorted(set(follow + unfollow) - authors.keys()),
+    })
+
+
+def following(request):
+    """Список подписок по GET, пакетное изменение по POST."""
+    if request.method == 'POST':
+        return follow_batch(request)
+    return following_list(request)
@@ -0,0 +1,40 @@
+"""Настройка соединений с базой данных.
+
+Прагмы SQLite ставятся при открытии каждого соединения, а постоянные
+соединения с сервером базы проверяются в начале запроса.
+"""
+from django.conf import settings
+from django.db import connections
+
+
+def apply_pragmas(db, pragmas):
+    """Выполняет ``PRAGMA`` из словаря на соединении sqlite3."""
+    for name, value in pragmas.items():
+        db.execute(f'PRAGMA {name}={value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Ставит ``SQLITE_PRAGMAS`` новому соединению SQLite.
+
+    Прагмы выполняются на соединении sqlite3 напрямую, мимо курсоров
+    Django, и не попадают в счётчики запросов.
+    """
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection, settings.SQLITE_PRAGMAS)
+
+
+def check_connections(**kwargs):
+    """Закрывает постоянные соединения, разорванные сервером.
+
+    Django 2.2 проверяет соединение только после ошибки в нём, и первый
+    запрос после перезапуска сервера базы падал бы. Закрытое соединение
+    откроется заново при первом обращении.
+    """
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and connection.settings_dict['CONN_MAX_AGE'] != 0
+            and not connection.in_atomic_block
+            and not connection.is_usable()
+        ):
+            connection.close()
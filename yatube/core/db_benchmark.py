@@ -0,0 +1,135 @@
+"""Замер одновременного чтения и записи в SQLite с разными прагмами.
+
+Читатели и писатели работают в отдельных потоках со своими
+соединениями к временному файлу базы, как процессы и потоки сервера.
+Запись - короткие транзакции вставки, чтение - выборка последних
+строк автора по индексу, как в ленте профиля.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+from .db import apply_pragmas
+
+PROFILES = {
+    'default': {},
+    'tuned': settings.SQLITE_PRAGMAS,
+}
+DEFAULTS = {
+    'readers': 4,
+    'writers': 2,
+    'seconds': 3.0,
+    'rows': 10000,
+}
+AUTHORS = 100
+
+
+def _connect(path, pragmas):
+    db = sqlite3.connect(
+        path,
+        timeout=settings.DATABASES['default'].get('OPTIONS', {}).get(
+            'timeout', 5
+        ),
+        isolation_level=None,
+        check_same_thread=False,
+    )
+    apply_pragmas(db, pragmas)
+    return db
+
+
+def _prepare(path, rows):
+    db = _connect(path, {})
+    db.execute(
+        'CREATE TABLE item ('
+        'id INTEGER PRIMARY KEY, author INTEGER, text TEXT, created REAL)'
+    )
+    db.execute('CREATE INDEX item_author_created ON item (author, created)')
+    rnd = random.Random(1)
+    with db:
+        db.executemany(
+            'INSERT INTO item (author, text, created) VALUES (?, ?, ?)',
+            (
+                (rnd.randrange(AUTHORS), 'x' * 200, number)
+                for number in range(rows)
+            ),
+        )
+    db.close()
+
+
+def _write(db, rnd):
+    db.execute('BEGIN IMMEDIATE')
+    db.execute(
+        'INSERT INTO item (author, text, created) VALUES (?, ?, ?)',
+        (rnd.randrange(AUTHORS), 'x' * 200, time.time()),
+    )
+    db.execute('COMMIT')
+
+
+def _read(db, rnd):
+    db.execute(
+        'SELECT id, text FROM item WHERE author = ? '
+        'ORDER BY created DESC LIMIT 10',
+        (rnd.randrange(AUTHORS),),
+    ).fetchall()
+
+
+def _worker(path, pragmas, operation, deadline, counts, seed):
+    db = _connect(path, pragmas)
+    rnd = random.Random(seed)
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            operation(db, rnd)
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+    db.close()
+    counts.append((operation, done, errors))
+
+
+def measure(pragmas, readers, writers, seconds, rows):
+    """Операций чтения и записи в секунду и число ошибок блокировки."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.sqlite3')
+        _prepare(path, rows)
+        # journal_mode хранится в файле базы: ставим его до старта потоков.
+        _connect(path, pragmas).close()
+        counts = []
+        deadline = time.monotonic() + seconds
+        threads = [
+            threading.Thread(
+                target=_worker,
+                args=(path, pragmas, operation, deadline, counts, seed),
+            )
+            for seed, operation in enumerate(
+                [_read] * readers + [_write] * writers
+            )
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return {
+        'reads': round(
+            sum(done for op, done, _ in counts if op is _read) / seconds, 1
+        ),
+        'writes': round(
+            sum(done for op, done, _ in counts if op is _write) / seconds, 1
+        ),
+        'errors': sum(errors for _, _, errors in counts),
+    }
+
+
+def run(readers, writers, seconds, rows, profiles=PROFILES):
+    """Замеряет каждый набор прагм из ``profiles``."""
+    return {
+        name: measure(pragmas, readers, writers, seconds, rows)
+        for name, pragmas in profiles.items()
+    }
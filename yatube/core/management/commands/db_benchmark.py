@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.db_benchmark import DEFAULTS, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет одновременное чтение и запись во временной базе SQLite '
+        'с прагмами по умолчанию и с SQLITE_PRAGMAS.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULTS.items():
+            parser.add_argument(
+                f'--{name}', type=type(default), default=default
+            )
+
+    def handle(self, *args, **options):
+        results = run(**{name: options[name] for name in DEFAULTS})
+        columns = ('reads', 'writes', 'errors')
+        self.stdout.write(
+            f"{'прагмы':<10}" + ''.join(f'{column:>10}' for column in columns)
+        )
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name:<10}'
+                + ''.join(f'{stats[column]:>10}' for column in columns)
+            )
@@ -0,0 +1,144 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+METRICS = {
+    'queries': ('Количество SQL-запросов', QUERY_BUCKETS),
+    'db_seconds': ('Время в базе данных', LATENCY_BUCKETS),
+    'template_seconds': ('Время отрисовки шаблонов', LATENCY_BUCKETS),
+    'thumbnail_seconds': ('Время подготовки картинок', LATENCY_BUCKETS),
+    'latency_seconds': ('Полное время ответа', LATENCY_BUCKETS),
+}
+
+_local = threading.local()
+
+
+class RequestStats:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.thumbnail_seconds = 0.0
+        self.latency_seconds = 0.0
+        self._depth = {}
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in METRICS}
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка ``connection.execute_wrapper`` для учёта запросов."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Collector:
+    """Гистограммы замеров по именам представлений."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def observe(self, view_name, stats):
+        with self._lock:
+            for metric, value in stats.as_dict().items():
+                histogram = self._histograms.get((metric, view_name))
+                if histogram is None:
+                    histogram = self._histograms[(metric, view_name)] = (
+                        Histogram(METRICS[metric][1])
+                    )
+                histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render(self, prefix='yatube_view'):
+        """Гистограммы в текстовом формате Prometheus."""
+        lines = []
+        with self._lock:
+            for metric, (help_text, _) in METRICS.items():
+                name = f'{prefix}_{metric}'
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (key, view_name), histogram in sorted(
+                    self._histograms.items()
+                ):
+                    if key != metric:
+                        continue
+                    label = f'view="{view_name}"'
+                    total = 0
+                    bounds = [*map(str, histogram.buckets), '+Inf']
+                    for bound, count in zip(bounds, histogram.counts):
+                        total += count
+                        lines.append(
+                            f'{name}_bucket{{{label},le="{bound}"}} {total}'
+                        )
+                    lines.append(f'{name}_sum{{{label}}} {histogram.sum}')
+                    lines.append(
+                        f'{name}_count{{{label}}} {histogram.count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+collector = Collector()
+
+
+def current_stats():
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def collect_request():
+    """Делает ``RequestStats`` текущими для потока на время запроса."""
+    stats = _local.stats = RequestStats()
+    try:
+        yield stats
+    finally:
+        _local.stats = None
+
+
+@contextmanager
+def timer(metric):
+    """Добавляет время блока к метрике текущего запроса.
+
+    Вложенные замеры одной метрики не суммируются повторно.
+    """
+    stats = current_stats()
+    if stats is None or stats._depth.get(metric):
+        yield
+        return
+    stats._depth[metric] = 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats._depth[metric] = 0
+        setattr(
+            stats, metric,
+            getattr(stats, metric) + time.perf_counter() - started
+        )
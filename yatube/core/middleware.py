@@ -0,0 +1,62 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import collect_request, collector
+from .routers import routing, wrote
+
+PRIMARY_COOKIE = 'use_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class MetricsMiddleware:
+    """Собирает число запросов к БД, время БД, шаблонов и ответа
+    по имени представления.
+
+    Замеры запроса доступны в ``response.metrics``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with collect_request() as stats, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        stats.latency_seconds = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        collector.observe(match.view_name if match else 'unresolved', stats)
+        response.metrics = stats
+        return response
+
+
+class ReplicaMiddleware:
+    """Читает безопасные запросы с реплик базы данных.
+
+    После записи браузер получает на ``REPLICA_PIN_SECONDS`` куку,
+    с которой его запросы читают из основной базы: так пользователь
+    сразу видит свои изменения, даже если реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = (
+            request.method in SAFE_METHODS
+            and PRIMARY_COOKIE not in request.COOKIES
+        )
+        with routing(replicas):
+            response = self.get_response(request)
+            if wrote():
+                response.set_cookie(
+                    PRIMARY_COOKIE, '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        return response
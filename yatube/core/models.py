@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -10,3 +11,74 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class Task(models.Model):
+    """Отложенный вызов функции из ``core.tasks``."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    name = models.CharField(
+        'Функция',
+        max_length=200,
+    )
+    args = models.TextField(
+        'Аргументы в JSON',
+        default='[]',
+    )
+    key = models.CharField(
+        'Ключ идемпотентности',
+        max_length=200,
+        unique=True,
+        null=True,
+        blank=True,
+    )
+    status = models.CharField(
+        'Состояние',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveIntegerField(
+        'Попыток',
+        default=0,
+    )
+    max_attempts = models.PositiveIntegerField(
+        'Допустимо попыток',
+    )
+    run_after = models.DateTimeField(
+        'Выполнить после',
+        default=timezone.now,
+    )
+    locked_until = models.DateTimeField(
+        'Занята до',
+        null=True,
+        blank=True,
+    )
+    last_error = models.TextField(
+        'Последняя ошибка',
+        blank=True,
+    )
+    created = models.DateTimeField(
+        'Дата создания',
+        auto_now_add=True,
+    )
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='core_task_status_run_idx',
+            ),
+        )
+        verbose_name_plural = 'Задачи'
+        verbose_name = 'Задача'
+
+    def __str__(self):
+        return f'{self.name}{self.args}'
@@ -0,0 +1,67 @@
+"""Чтение с реплик базы данных и запись в основную базу.
+
+Реплики используются только там, где это явно разрешено:
+``ReplicaMiddleware`` разрешает их безопасным запросам. Команды,
+обработчик задач и всё, что выполняется вне запросов, читают из
+основной базы, поэтому отставание реплик им не мешает.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+@contextmanager
+def routing(replicas):
+    """Блок, в котором ``replicas`` разрешает чтение с реплик до первой
+    записи, а ``wrote()`` сообщает, была ли запись."""
+    previous = (
+        getattr(_state, 'replicas', False), getattr(_state, 'wrote', False)
+    )
+    _state.replicas, _state.wrote = replicas, False
+    try:
+        yield
+    finally:
+        _state.replicas, _state.wrote = previous
+
+
+def wrote():
+    return getattr(_state, 'wrote', False)
+
+
+def use_primary():
+    """Дальше в текущем блоке читать из основной базы."""
+    _state.replicas = False
+
+
+class ReplicaRouter:
+    """Чтение - со случайной реплики из ``DATABASE_REPLICAS``,
+    запись - в основную базу.
+
+    После записи чтения снова идут в основную базу, чтобы запрос видел
+    собственные изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.DATABASE_REPLICAS
+            and getattr(_state, 'replicas', False)
+            and not wrote()
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
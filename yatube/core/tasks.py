@@ -0,0 +1,133 @@
+"""Очередь фоновых задач с брокером в таблице базы данных.
+
+Задача ставится в той же транзакции, что и изменение данных, поэтому
+выполняется только для зафиксированных изменений. Обработчик
+``run_tasks`` забирает задачи условным UPDATE, без блокировок строк,
+и повторяет упавшие с растущей задержкой. Задачи выполняются
+не меньше одного раза, поэтому функции задач должны быть идемпотентны.
+
+С ``TASKS_EAGER`` задачи выполняются сразу при постановке, как будто
+очереди нет: так работают разработка и тесты. Задачи с ``delay``
+всегда ставятся в очередь.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 10
+# Задача упавшего обработчика снова доступна после этого срока.
+LEASE_SECONDS = 300
+BATCH_SIZE = 100
+
+
+def task(max_attempts=MAX_ATTEMPTS, key=None, delay=None):
+    """Делает функцию задачей с методом ``enqueue(*args)``.
+
+    ``key`` - шаблон ключа идемпотентности по аргументам, например
+    ``'images:{0}'``: пока задача с таким ключом ждёт в очереди,
+    повторная постановка ничего не добавляет.
+
+    Задача с ``delay`` выполняется не раньше чем через ``delay`` секунд
+    после постановки даже с ``TASKS_EAGER``. Вместе с ``key`` это
+    сводит частые постановки в один запуск на интервал.
+    """
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+        func.key_template = key
+        func.delay = delay
+        func.enqueue = lambda *args: enqueue(func, *args)
+        return func
+    return decorator
+
+
+def enqueue(func, *args):
+    """Ставит задачу в очередь, с ``TASKS_EAGER`` - выполняет сразу."""
+    if settings.TASKS_EAGER and func.delay is None:
+        func(*args)
+        return
+    Task.objects.bulk_create(
+        [
+            Task(
+                name=func.task_name,
+                args=json.dumps(args, cls=DjangoJSONEncoder),
+                key=func.key_template and func.key_template.format(*args),
+                max_attempts=func.max_attempts,
+                run_after=timezone.now() + timedelta(
+                    seconds=func.delay or 0
+                ),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _claim(task_id, now):
+    """Забирает задачу себе, если её не забрал другой обработчик.
+
+    Ключ освобождается сразу: изменения, сделанные во время
+    выполнения, должны поставить новую задачу, а не слиться с этой.
+    """
+    return Task.objects.filter(
+        Q(status=Task.PENDING) | Q(locked_until__lt=now),
+        pk=task_id,
+    ).exclude(status=Task.FAILED).update(
+        status=Task.RUNNING,
+        key=None,
+        attempts=F('attempts') + 1,
+        locked_until=now + timedelta(seconds=LEASE_SECONDS),
+    )
+
+
+def _run(task_row):
+    try:
+        func = import_string(task_row.name)
+        with transaction.atomic():
+            func(*json.loads(task_row.args))
+    except Exception:
+        error = traceback.format_exc()
+        if task_row.attempts >= task_row.max_attempts:
+            logger.error('Задача %s не выполнена: %s', task_row, error)
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.FAILED, last_error=error, locked_until=None
+            )
+        else:
+            delay = RETRY_DELAY * 2 ** (task_row.attempts - 1)
+            Task.objects.filter(pk=task_row.pk).update(
+                status=Task.PENDING,
+                last_error=error,
+                locked_until=None,
+                run_after=timezone.now() + timedelta(seconds=delay),
+            )
+        return False
+    Task.objects.filter(pk=task_row.pk).delete()
+    return True
+
+
+def run_pending(batch_size=BATCH_SIZE):
+    """Выполняет готовые к запуску задачи, возвращает их число."""
+    now = timezone.now()
+    ready = Task.objects.filter(
+        Q(status=Task.PENDING, run_after__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    ).order_by('run_after', 'pk').values_list('pk', flat=True)[:batch_size]
+    done = 0
+    for task_id in list(ready):
+        if not _claim(task_id, now):
+            continue
+        _run(Task.objects.get(pk=task_id))
+        done += 1
+    return done
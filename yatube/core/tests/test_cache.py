@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import SQLiteCache
+
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+SHARED_LOCATION = os.path.join(TEMP_CACHE_DIR, 'shared.db')
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = SQLiteCache(SHARED_LOCATION, {})
+        self.other_process = SQLiteCache(SHARED_LOCATION, {})
+        self.cache.clear()
+
+    def test_values_shared_between_instances(self):
+        """Запись видна другому экземпляру с тем же файлом."""
+        self.cache.set('key', {'value': [1, 2]})
+        self.assertEqual(self.other_process.get('key'), {'value': [1, 2]})
+        self.other_process.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_is_exclusive(self):
+        """add удаётся только одному экземпляру."""
+        self.assertTrue(self.cache.add('lock', True, 30))
+        self.assertFalse(self.other_process.add('lock', True, 30))
+
+    def test_incr(self):
+        """incr увеличивает целое значение и падает на отсутствующем."""
+        self.cache.set('counter', 1)
+        self.assertEqual(self.other_process.incr('counter'), 2)
+        self.assertEqual(self.cache.get('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_expired_value_not_returned(self):
+        """Просроченная запись не возвращается и не мешает add."""
+        self.cache.set('key', 'value', -1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {'L1': 'local', 'L2': 'shared'},
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'l1',
+    },
+    'shared': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': SHARED_LOCATION,
+    },
+})
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches['default']
+        self.cache.clear()
+
+    def test_value_kept_in_both_tiers(self):
+        """Запись попадает и в L1, и в L2."""
+        self.cache.set('key', 'value')
+        self.assertEqual(caches['local'].get('key'), 'value')
+        self.assertEqual(caches['shared'].get('key'), 'value')
+
+    def test_l1_filled_from_l2(self):
+        """Промах L1 берётся из L2 и запоминается локально."""
+        caches['shared'].set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(caches['local'].get('key'), 'value')
+
+    def test_versions_bypass_l1(self):
+        """Счётчики версий читаются только из общего кэша."""
+        self.cache.set('version:index:', 1)
+        caches['shared'].incr('version:index:')
+        self.assertIsNone(caches['local'].get('version:index:'))
+        self.assertEqual(self.cache.get('version:index:'), 2)
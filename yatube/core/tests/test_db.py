@@ -0,0 +1,65 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from ..db import check_connections
+from ..db_benchmark import run
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_pragmas_applied(self):
+        """Новое соединение SQLite получает прагмы из настроек."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+
+
+class HealthCheckTests(SimpleTestCase):
+    def patch_connection(self, max_age, usable):
+        fake = mock.Mock(
+            connection=object(),
+            settings_dict={'CONN_MAX_AGE': max_age},
+            in_atomic_block=False,
+        )
+        fake.is_usable.return_value = usable
+        patcher = mock.patch('core.db.connections')
+        patcher.start().all.return_value = [fake]
+        self.addCleanup(patcher.stop)
+        return fake
+
+    def test_broken_persistent_connection_closed(self):
+        """Разорванное постоянное соединение закрывается."""
+        fake = self.patch_connection(max_age=600, usable=False)
+        check_connections()
+        fake.close.assert_called_once_with()
+
+    def test_live_or_short_connection_kept(self):
+        """Живое и непостоянное соединения не трогаются."""
+        for max_age, usable in ((600, True), (0, False)):
+            with self.subTest(max_age=max_age):
+                fake = self.patch_connection(max_age, usable)
+                check_connections()
+                fake.close.assert_not_called()
+
+
+class DatabaseBenchmarkTests(SimpleTestCase):
+    def test_both_profiles_measured(self):
+        """Замер выполняет чтение и запись с каждым набором прагм."""
+        results = run(readers=1, writers=1, seconds=0.2, rows=100)
+        self.assertEqual(set(results), {'default', 'tuned'})
+        for stats in results.values():
+            self.assertGreater(stats['reads'], 0)
+            self.assertGreater(stats['writes'], 0)
+
+    def test_command_prints_table(self):
+        """Команда печатает строку каждого набора прагм."""
+        out = StringIO()
+        call_command(
+            'db_benchmark', '--seconds', '0.1', '--rows', '10', stdout=out
+        )
+        self.assertIn('tuned', out.getvalue())
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..metrics import RequestStats, collector
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.admin = User.objects.create_user(
+            username='admin', is_staff=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        collector.reset()
+
+    def test_request_measured(self):
+        """Ответ несёт замеры запросов к БД и отрисовки шаблонов."""
+        response = Client().get(reverse('posts:index'))
+        self.assertGreater(response.metrics.queries, 0)
+        self.assertGreater(response.metrics.template_seconds, 0)
+        self.assertGreaterEqual(
+            response.metrics.latency_seconds,
+            response.metrics.template_seconds,
+        )
+
+    def test_metrics_only_for_staff(self):
+        """Метрики доступны только сотрудникам."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_metrics_prometheus_format(self):
+        """Гистограммы выводятся по имени представления."""
+        client = Client()
+        client.force_login(self.admin)
+        client.get(reverse('posts:index'))
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn('# TYPE yatube_view_queries histogram', content)
+        self.assertIn(
+            'yatube_view_latency_seconds_count{view="posts:index"} 1',
+            content,
+        )
+
+    def test_histogram_buckets_cumulative(self):
+        """Счётчики корзин гистограммы накапливаются."""
+        for queries in (1, 3, 300):
+            stats = RequestStats()
+            stats.queries = queries
+            collector.observe('view', stats)
+        content = collector.render()
+        for bound, count in (('1', 1), ('5', 2), ('200', 2), ('+Inf', 3)):
+            self.assertIn(
+                f'yatube_view_queries_bucket{{view="view",le="{bound}"}} '
+                f'{count}',
+                content,
+            )
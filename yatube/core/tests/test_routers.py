@@ -0,0 +1,79 @@
+from django.db import DEFAULT_DB_ALIAS, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from posts.cache import bump_versions, read_fresh, version_key
+from posts.models import Post
+
+from ..middleware import PRIMARY_COOKIE, ReplicaMiddleware
+from ..routers import routing, use_primary
+
+REPLICA = 'replica_1'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_primary_outside_requests(self):
+        """Вне разрешающего блока чтение идёт в основную базу."""
+        self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_reads_replica_until_write(self):
+        """Чтение идёт с реплики до первой записи."""
+        with routing(True):
+            self.assertEqual(router.db_for_read(Post), REPLICA)
+            self.assertEqual(router.db_for_write(Post), DEFAULT_DB_ALIAS)
+            self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+        with routing(True):
+            use_primary()
+            self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+
+    def test_replica_not_migrated(self):
+        """Миграции к репликам не применяются."""
+        self.assertFalse(router.allow_migrate(REPLICA, 'posts'))
+        self.assertTrue(router.allow_migrate(DEFAULT_DB_ALIAS, 'posts'))
+
+    def test_recent_change_read_from_primary(self):
+        """Недавно изменённые данные читаются из основной базы."""
+        key = version_key('post', 0)
+        bump_versions(key)
+        with routing(True):
+            read_fresh(key)
+            self.assertEqual(router.db_for_read(Post), DEFAULT_DB_ALIAS)
+        with self.settings(REPLICA_PIN_SECONDS=0), routing(True):
+            read_fresh(key)
+            self.assertEqual(router.db_for_read(Post), REPLICA)
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.read_from = []
+
+    def call(self, request, write=False):
+        def get_response(request):
+            self.read_from.append(router.db_for_read(Post))
+            if write:
+                router.db_for_write(Post)
+            return HttpResponse()
+        return ReplicaMiddleware(get_response)(request)
+
+    def test_safe_request_reads_replica(self):
+        """GET без куки читает с реплики и куку не получает."""
+        response = self.call(self.factory.get('/'))
+        self.assertEqual(self.read_from, [REPLICA])
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_unsafe_or_pinned_request_reads_primary(self):
+        """POST и запросы с кукой читают из основной базы."""
+        self.call(self.factory.post('/'))
+        self.factory.cookies[PRIMARY_COOKIE] = '1'
+        self.call(self.factory.get('/'))
+        self.assertEqual(self.read_from, [DEFAULT_DB_ALIAS] * 2)
+
+    def test_write_pins_browser_to_primary(self):
+        """После записи браузер получает куку основной базы."""
+        response = self.call(self.factory.post('/'), write=True)
+        cookie = response.cookies[PRIMARY_COOKIE]
+        self.assertEqual(cookie['max-age'], 10)
+        self.assertTrue(cookie['httponly'])
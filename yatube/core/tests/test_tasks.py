@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Task
+from ..tasks import run_pending, task
+
+calls = []
+
+
+@task(key='record:{0}')
+def record(value):
+    calls.append(value)
+
+
+@task(key='requeue:{0}')
+def requeue(value):
+    calls.append(value)
+    requeue.enqueue(value)
+
+
+@task(key='delayed:{0}', delay=60)
+def delayed(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def fail(value):
+    calls.append(value)
+    raise ValueError('Ошибка задачи')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_task_runs_once(self):
+        """Задача выполняется обработчиком и удаляется из очереди."""
+        record.enqueue(1)
+        self.assertEqual(calls, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_pending_duplicates_coalesced(self):
+        """Пока задача ждёт, задача с тем же ключом не добавляется."""
+        record.enqueue(1)
+        record.enqueue(1)
+        record.enqueue(2)
+        self.assertEqual(Task.objects.count(), 2)
+        run_pending()
+        self.assertEqual(sorted(calls), [1, 2])
+
+    def test_key_released_when_claimed(self):
+        """Постановка во время выполнения создаёт новую задачу."""
+        requeue.enqueue(1)
+        run_pending()
+        self.assertEqual(Task.objects.get().key, 'requeue:1')
+
+    def test_failed_task_retried_with_delay(self):
+        """Упавшая задача повторяется позже, после последней попытки
+        остаётся в очереди с ошибкой."""
+        fail.enqueue(1)
+        run_pending()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.PENDING)
+        self.assertGreater(failed.run_after, timezone.now())
+        self.assertIn('Ошибка задачи', failed.last_error)
+        self.assertEqual(run_pending(), 0)
+        Task.objects.update(run_after=timezone.now())
+        with self.assertLogs('core.tasks', 'ERROR'):
+            run_pending()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 2)
+        self.assertEqual(calls, [1, 1])
+
+    def test_expired_lease_reclaimed(self):
+        """Задачу упавшего обработчика забирает другой."""
+        record.enqueue(1)
+        Task.objects.update(
+            status=Task.RUNNING,
+            locked_until=timezone.now() - timedelta(seconds=1),
+        )
+        run_pending()
+        self.assertEqual(calls, [1])
+
+    def test_eager_runs_immediately(self):
+        """С TASKS_EAGER задача выполняется при постановке."""
+        with self.settings(TASKS_EAGER=True):
+            record.enqueue(1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_delayed_task_queued_even_when_eager(self):
+        """Задача с delay откладывается и с TASKS_EAGER, повторные
+        постановки до запуска сливаются в одну."""
+        with self.settings(TASKS_EAGER=True):
+            delayed.enqueue(1)
+            delayed.enqueue(1)
+        self.assertEqual(calls, [])
+        self.assertGreater(Task.objects.get().run_after, timezone.now())
+        self.assertEqual(run_pending(), 0)
+        Task.objects.update(run_after=timezone.now())
+        run_pending()
+        self.assertEqual(calls, [1])
+
+    def test_command_drains_queue(self):
+        """Команда с --once выполняет все готовые задачи."""
+        record.enqueue(1)
+        record.enqueue(2)
+        out = StringIO()
+        call_command('run_tasks', '--once', stdout=out)
+        self.assertIn('Обработано задач: 2', out.getvalue())
@@ -1,9 +1,17 @@
 from django.contrib import admin
 
 from .models import Post, Group, Comment, Follow
+from .search import get_backend
 
 
-class PostAdmin(admin.ModelAdmin):
+class SearchIndexMixin:
+    """Поиск в админке через полнотекстовый индекс вместо LIKE."""
+
+    def get_search_results(self, request, queryset, search_term):
+        return get_backend().filter(queryset, search_term), False
+
+
+class PostAdmin(SearchIndexMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
     search_fields = ('text',)
@@ -11,7 +19,7 @@ class PostAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(SearchIndexMixin, admin.ModelAdmin):
     list_display = ('pk', 'post', 'created', 'author', 'text')
     search_fields = ('text',)
     list_filter = ('created',)
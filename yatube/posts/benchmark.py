@@ -0,0 +1,213 @@
+"""Нагрузочный замер страниц постов на синтетических данных.
+
+Данные генерируются воспроизводимо по ``seed``: авторы, подписки
+и комментарии распределены по степенному закону, как в живой сети,
+где немногие популярные авторы собирают большую часть внимания.
+"""
+import random
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Group, Post, UserStats
+from .transfer import Importer
+from .views import NUMBER_OF_POSTS
+
+POWER_LAW_ALPHA = 1.2
+DATA_DEFAULTS = {
+    'users': 500,
+    'groups': 20,
+    'posts': 5000,
+    'follows': 5000,
+    'comments': 10000,
+    'seed': 1,
+}
+PERCENTILES = ('p50', 'p95', 'p99')
+# p99 по нескольким десяткам запросов почти равен максимуму и слишком
+# шумит, поэтому регрессию по нему не определяем.
+CHECKED_PERCENTILES = ('p50', 'p95')
+WORDS = (
+    'утро', 'город', 'река', 'книга', 'поезд', 'чай', 'море', 'дорога',
+    'снег', 'музыка', 'друг', 'лес', 'кофе', 'дом', 'вечер', 'картина',
+)
+
+
+def _power_law(rnd, count):
+    """Номер от 0 до ``count - 1``: малые номера намного вероятнее."""
+    rank = int(rnd.paretovariate(POWER_LAW_ALPHA)) - 1
+    return rank if rank < count else rnd.randrange(count)
+
+
+def _text(rnd, length):
+    return ' '.join(rnd.choice(WORDS) for _ in range(length)).capitalize()
+
+
+def generate_data(users, groups, posts, follows, comments, seed):
+    """Заполняет базу через пакетный импорт, возвращает число строк."""
+    rnd = random.Random(seed)
+    now = timezone.now()
+    usernames = [f'bench-user-{number}' for number in range(users)]
+    slugs = [f'bench-group-{number}' for number in range(groups)]
+    first_post = (Post.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def date(seconds):
+        return (now - timedelta(seconds=seconds)).isoformat()
+
+    group_rows = (
+        {'slug': slug, 'title': slug, 'description': ''} for slug in slugs
+    )
+    post_rows = (
+        {
+            'id': first_post + number,
+            'author': usernames[_power_law(rnd, users)],
+            'group': rnd.choice(slugs) if rnd.random() < 0.7 else None,
+            'text': _text(rnd, rnd.randint(5, 40)),
+            'pub_date': date((posts - number) * 600),
+        }
+        for number in range(posts)
+    )
+    comment_rows = (
+        {
+            'post': first_post + posts - 1 - _power_law(rnd, posts),
+            'author': rnd.choice(usernames),
+            'text': _text(rnd, rnd.randint(3, 15)),
+            'created': date(rnd.randrange(600 * posts)),
+        }
+        for _ in range(comments)
+    )
+    follow_rows = (
+        {
+            'user': rnd.choice(usernames),
+            'author': usernames[_power_law(rnd, users)],
+        }
+        for _ in range(follows)
+    )
+    importer = Importer(workers=0)
+    count = 0
+    for kind, rows in (
+        ('groups', group_rows),
+        ('posts', post_rows),
+        ('comments', comment_rows),
+        ('follows', follow_rows),
+    ):
+        count += importer.run(kind, rows)
+    importer.finish()
+    return count
+
+
+def scenarios():
+    """Страницы для замера: (имя, адрес, пользователь или None).
+
+    Берутся самые тяжёлые случаи: популярная группа, самый активный
+    автор, подписчик с наибольшей лентой, пост с наибольшим числом
+    комментариев и глубокая страница главной.
+    """
+    group = Group.objects.annotate(
+        total=Count('posts')
+    ).order_by('-total').first()
+    author = UserStats.objects.order_by('-posts_count').first().user
+    reader = UserStats.objects.order_by('-following_count').first().user
+    post = Post.objects.order_by('-comments_count').first()
+    last_page = max(Post.objects.count() // NUMBER_OF_POSTS, 1)
+    return [
+        ('index', reverse('posts:index'), None),
+        (
+            'index_deep',
+            f"{reverse('posts:index')}?page={last_page}",
+            None,
+        ),
+        (
+            'group_posts',
+            reverse('posts:group_list', kwargs={'slug': group.slug}),
+            None,
+        ),
+        (
+            'profile',
+            reverse('posts:profile', kwargs={'username': author.username}),
+            None,
+        ),
+        ('follow_index', reverse('posts:follow_index'), reader),
+        (
+            'post_detail',
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+            None,
+        ),
+    ]
+
+
+def percentile(values, percent):
+    """Перцентиль с линейной интерполяцией между соседними значениями
+    отсортированного списка: ``statistics.quantiles`` нет в Python 3.7."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (
+        (ordered[upper] - ordered[lower]) * (position - lower)
+    )
+
+
+def summarize(latencies, queries):
+    return {
+        'p50': round(percentile(latencies, 50) * 1000, 2),
+        'p95': round(percentile(latencies, 95) * 1000, 2),
+        'p99': round(percentile(latencies, 99) * 1000, 2),
+        'queries': max(queries),
+        'rps': round(len(latencies) / sum(latencies), 2),
+    }
+
+
+def run_scenarios(requests, warmup=5, cold=True):
+    """Замеряет страницы тестовым клиентом.
+
+    При ``cold`` кэш очищается перед каждым запросом, и в замер попадает
+    вся работа представления, а не чтение готовой страницы из кэша.
+    """
+    results = {}
+    for name, url, user in scenarios():
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+        for _ in range(warmup):
+            client.get(url)
+        latencies = []
+        queries = []
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - started)
+            queries.append(response.metrics.queries)
+        results[name] = summarize(latencies, queries)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно ``baseline``.
+
+    Число запросов не должно расти вовсе, p50 и p95 - не больше чем
+    на долю ``tolerance``.
+    """
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if stats['queries'] > base['queries']:
+            regressions.append(
+                f"{name}: запросов {stats['queries']} "
+                f"вместо {base['queries']}"
+            )
+        for key in CHECKED_PERCENTILES:
+            if stats[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: {key} {stats[key]:.1f} мс '
+                    f'вместо {base[key]:.1f} мс'
+                )
+    return regressions
@@ -0,0 +1,234 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from core.routers import use_primary
+
+VERSION_PREFIX = 'version'
+PAGE_CACHE_TIMEOUT = 60 * 60
+PAGE_STALE_TIMEOUT = 60
+PAGE_LOCK_TIMEOUT = 30
+
+
+def version_key(scope, pk=''):
+    return f'{VERSION_PREFIX}:{scope}:{pk}'
+
+
+def _initial_version():
+    """Начальная версия растёт со временем.
+
+    Если ключ версии вытеснен из кэша, новая версия не совпадёт
+    со старыми и устаревшие фрагменты не будут найдены.
+    """
+    return int(time.time() * 1000)
+
+
+def get_versions(*keys):
+    """Возвращает версии для ключей, заводя недостающие."""
+    versions = cache.get_many(keys)
+    missing = {key: _initial_version() for key in keys if key not in versions}
+    if missing:
+        # Время изменения вытесненной версии неизвестно, считаем,
+        # что она изменилась только что.
+        now = time.time()
+        cache.set_many({
+            **missing,
+            **{_changed_key(key): now for key in missing},
+        }, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*keys):
+    """Инвалидирует всё, что закэшировано под этими версиями."""
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+    if keys:
+        now = time.time()
+        cache.set_many({_changed_key(key): now for key in keys}, None)
+
+
+def bump_on_commit(*keys):
+    """Инвалидирует версии после фиксации текущей транзакции.
+
+    Повышенную до фиксации версию успел бы прочитать параллельный
+    запрос, который ещё видит старые строки, и закэшировать под ней
+    устаревшую страницу. Вне транзакции версии повышаются сразу.
+    """
+    transaction.on_commit(lambda: bump_versions(*keys))
+
+
+def _changed_key(key):
+    return f'{key}:changed'
+
+
+def get_last_modified(*keys):
+    """Время последнего изменения версий ``keys`` или None,
+    если ни одна из них не менялась на памяти кэша."""
+    changed = cache.get_many([_changed_key(key) for key in keys]).values()
+    return max(changed, default=None)
+
+
+def read_fresh(*keys):
+    """Переключает запрос на основную базу, если данные под ``keys``
+    менялись недавно.
+
+    Реплика могла ещё не получить изменение, а отрисованное с неё под
+    новой версией осталось бы в кэше до следующего изменения.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return
+    changed = get_last_modified(*keys)
+    if (
+        changed is not None
+        and time.time() - changed < settings.REPLICA_PIN_SECONDS
+    ):
+        use_primary()
+
+
+def post_card_version(post):
+    """Версия карточки поста: сам пост, его автор и группа."""
+    post_version, author_version, group_version = get_versions(
+        version_key('post', post.pk),
+        version_key('user', post.author_id),
+        version_key('group', post.group_id),
+    )
+    return (
+        f'{post_version}.{author_version}.'
+        f'{post.group_id}.{group_version}'
+    )
+
+
+def post_comments_version(post):
+    """Версия первой страницы комментариев поста."""
+    return get_versions(version_key('comments', post.pk))[0]
+
+
+def cached_fragment(key, version, render, timeout=PAGE_CACHE_TIMEOUT,
+                    stale_timeout=PAGE_STALE_TIMEOUT):
+    """Кэширует результат ``render()`` под ``version`` с отдачей
+    устаревшей копии.
+
+    Запись считается свежей, пока версия не изменилась и не истёк
+    ``timeout``. Устаревшую запись перестраивает только вызов,
+    захвативший блокировку, остальные в это время получают старую копию.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        if (
+            entry['version'] == version
+            and entry['fresh_until'] > time.time()
+        ) or not cache.add(f'{key}:lock', True, PAGE_LOCK_TIMEOUT):
+            return entry['content']
+    try:
+        content = render()
+        cache.set(key, {
+            'version': version,
+            'fresh_until': time.time() + timeout,
+            'content': content,
+        }, timeout + stale_timeout)
+    finally:
+        if entry is not None:
+            cache.delete(f'{key}:lock')
+    return content
+
+
+def listing_body(path, keys, render):
+    """Тело ленты, общее для всех пользователей.
+
+    Ключ не зависит от пользователя: шапка, вкладки и кнопка подписки
+    отрисовываются вне тела при каждом запросе.
+    """
+    read_fresh(*keys)
+    digest = hashlib.md5(f'{path}:{keys}'.encode()).hexdigest()
+    return cached_fragment(f'listing:{digest}', get_versions(*keys), render)
+
+
+def listing_versions(request, **kwargs):
+    """Версии лент главной, групп и профилей.
+
+    Версия главной меняется при любом изменении постов, групп
+    и авторов, поэтому подходит для всех этих лент.
+    """
+    return [version_key('index')]
+
+
+def post_versions(request, post_id):
+    """Версии поста: его текст, комментарии и данные авторов."""
+    return [
+        version_key('post', post_id),
+        version_key('comments', post_id),
+        version_key('index'),
+    ]
+
+
+def versions_condition(version_keys, per_user=False):
+    """Условные запросы с валидаторами из версий кэша.
+
+    ``version_keys(request, **kwargs)`` возвращает ключи версий, которые
+    меняются вместе с ответом, или None, если их не определить.
+    ETag строится по версиям и адресу запроса, поэтому на неизменившиеся
+    данные приходит 304 без чтения строк и отрисовки шаблонов.
+
+    Для ``per_user`` в ETag входят пользователь и CSRF-токен из cookie,
+    а Last-Modified не отдаётся: после входа или выхода браузер мог бы
+    подтвердить по дате страницу, отрисованную для другого пользователя,
+    а после повторного входа - форму со старым токеном, отправка которой
+    закончилась бы ошибкой 403. Такие ответы помечаются как частные,
+    чтобы их не сохраняли общие кэши.
+    """
+    def validators(request, kwargs):
+        cached = getattr(request, '_version_validators', None)
+        if cached is None:
+            keys = version_keys(request, **kwargs)
+            if keys is None:
+                cached = (None, None)
+            else:
+                read_fresh(*keys)
+                raw = f'{get_versions(*keys)}:{request.get_full_path()}'
+                changed = None
+                if per_user:
+                    # get_token создаёт токен, если cookie ещё нет:
+                    # ETag сразу совпадёт с токеном отданной формы.
+                    get_token(request)
+                    csrf = request.META['CSRF_COOKIE']
+                    raw += f':{request.user.pk}:{csrf}'
+                else:
+                    changed = get_last_modified(*keys)
+                cached = (
+                    hashlib.md5(raw.encode()).hexdigest(),
+                    changed and datetime.fromtimestamp(changed, timezone.utc),
+                )
+            request._version_validators = cached
+        return cached
+
+    conditional = condition(
+        etag_func=lambda request, **kwargs: validators(request, kwargs)[0],
+        last_modified_func=(
+            lambda request, **kwargs: validators(request, kwargs)[1]
+        ),
+    )
+
+    def decorator(view):
+        view = conditional(view)
+
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            response = view(request, **kwargs)
+            patch_cache_control(response, no_cache=True, private=per_user)
+            if per_user:
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
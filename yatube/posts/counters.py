@@ -0,0 +1,102 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(model, field):
+    """Подзапрос с количеством строк ``model``, ссылающихся на ``pk``."""
+    rows = model.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def _user_counters():
+    return {
+        'posts_count': _count(Post, 'author'),
+        'followers_count': _count(Follow, 'author'),
+        'following_count': _count(Follow, 'user'),
+    }
+
+
+def refresh_user_stats(user_id):
+    """Пересчитывает счётчики пользователя по таблицам."""
+    UserStats.objects.get_or_create(user_id=user_id)
+    UserStats.objects.filter(pk=user_id).update(**_user_counters())
+
+
+def refresh_users_stats(user_ids):
+    """Пересчитывает счётчики пользователей ``user_ids`` по таблицам
+    одним INSERT недостающих строк и одним UPDATE."""
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in set(user_ids)],
+        ignore_conflicts=True,
+    )
+    UserStats.objects.filter(pk__in=user_ids).update(**_user_counters())
+
+
+def change_user_stats(user_id, **deltas):
+    """Сдвигает счётчики пользователя на ``deltas`` одним UPDATE.
+
+    Недостающая строка счётчиков создаётся только при увеличении:
+    при каскадном удалении пользователя её не нужно воскрешать.
+    """
+    updated = UserStats.objects.filter(pk=user_id).update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+    if not updated and any(delta > 0 for delta in deltas.values()):
+        refresh_user_stats(user_id)
+
+
+def refresh_follow_counts(user_id, author_ids):
+    """Пересчитывает по таблице подписок число подписок ``user_id``
+    и подписчиков ``author_ids`` двумя UPDATE на весь пакет.
+
+    Недостающие строки счётчиков создаются одним INSERT заранее:
+    UPDATE их бы пропустил.
+    """
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk) for pk in {user_id, *author_ids}],
+        ignore_conflicts=True,
+    )
+    UserStats.objects.filter(pk=user_id).update(
+        following_count=_count(Follow, 'user')
+    )
+    UserStats.objects.filter(pk__in=author_ids).update(
+        followers_count=_count(Follow, 'author')
+    )
+
+
+def refresh_comments_counts(post_ids):
+    """Пересчитывает число комментариев постов ``post_ids``."""
+    Post.objects.filter(pk__in=post_ids).update(
+        comments_count=_count(Comment, 'post')
+    )
+
+
+def change_comments_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=Greatest(F('comments_count') + delta, 0)
+    )
+
+
+def reconcile_counters():
+    """Исправляет расхождения счётчиков, возвращает число строк."""
+    UserStats.objects.bulk_create(
+        UserStats(user_id=user_id)
+        for user_id in User.objects.filter(
+            stats__isnull=True
+        ).values_list('pk', flat=True)
+    )
+    fixed = 0
+    for field, actual in _user_counters().items():
+        fixed += UserStats.objects.exclude(
+            **{field: actual}
+        ).update(**{field: actual})
+    actual = _count(Comment, 'post')
+    fixed += Post.objects.exclude(
+        comments_count=actual
+    ).update(comments_count=actual)
+    return fixed
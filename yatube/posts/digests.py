@@ -0,0 +1,154 @@
+"""Рассылка подписчикам дайджестов новых постов.
+
+Новые посты подписчика уже собраны в его ленте, поэтому дайджест -
+это записи ленты с id больше границы ``DigestState``. Граница - id,
+а не дата поста: с очередью задач запись ленты может появиться позже,
+чем рассылка прошла дату публикации поста. Подписчики
+обрабатываются пачками: записи ленты пачки читаются одним запросом,
+шаблоны загружаются один раз на рассылку, а письма уходят через одно
+соединение с ограничением скорости.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F, Max, Q
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import DigestState, FeedItem, User
+
+DIGEST_INTERVAL = timedelta(days=1)
+DIGEST_MAX_POSTS = 10
+DIGEST_BATCH_SIZE = 200
+TEMPLATES = ('posts/email/digest.txt', 'posts/email/digest.html')
+
+
+class RateLimiter:
+    """Выдерживает не больше ``rate`` событий в секунду."""
+
+    def __init__(self, rate, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1 / rate if rate else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.next_at = None
+
+    def wait(self):
+        now = self.clock()
+        if self.next_at is not None and now < self.next_at:
+            self.sleep(self.next_at - now)
+            now = self.next_at
+        self.next_at = now + self.interval
+
+
+def _recipients(until, batch_size):
+    """Пачки подписчиков с почтой, которым пора получить дайджест."""
+    due = User.objects.exclude(email='').filter(
+        Q(digest__isnull=True)
+        | Q(digest__sent_until__lte=until - DIGEST_INTERVAL)
+    ).order_by('pk')
+    last = 0
+    while True:
+        batch = list(
+            due.filter(pk__gt=last).only('pk', 'email', 'username')[
+                :batch_size
+            ]
+        )
+        if not batch:
+            return
+        yield batch
+        last = batch[-1].pk
+
+
+def _new_items(users, until, last_item_id):
+    """Новые записи лент ``users`` не дальше ``last_item_id``
+    с постами и авторами, по подписчикам.
+
+    Подписчику без границы достаются посты за последний интервал.
+    """
+    items = FeedItem.objects.filter(
+        Q(pk__gt=F('user__digest__last_item_id'))
+        | Q(
+            user__digest__isnull=True,
+            pub_date__gt=until - DIGEST_INTERVAL,
+        ),
+        user__in=users,
+        pk__lte=last_item_id,
+    ).select_related('post__author').order_by('user_id', '-pub_date')
+    grouped = {}
+    for item in items:
+        grouped.setdefault(item.user_id, []).append(item.post)
+    return grouped
+
+
+def _message(user, posts, templates):
+    shown = posts[:DIGEST_MAX_POSTS]
+    context = {
+        'user': user,
+        'posts': [
+            (
+                post,
+                settings.SITE_URL + reverse(
+                    'posts:post_detail', kwargs={'post_id': post.pk}
+                ),
+            )
+            for post in shown
+        ],
+        'more': len(posts) - len(shown),
+        'feed_url': settings.SITE_URL + reverse('posts:follow_index'),
+    }
+    text, html = (template.render(context) for template in templates)
+    message = EmailMultiAlternatives(
+        f'Новые посты в ваших подписках: {len(posts)}',
+        text,
+        settings.DEFAULT_FROM_EMAIL,
+        [user.email],
+    )
+    message.attach_alternative(html, 'text/html')
+    return message
+
+
+def _mark_sent(user_ids, until, last_item_id):
+    DigestState.objects.bulk_create(
+        [
+            DigestState(
+                user_id=pk, sent_until=until, last_item_id=last_item_id
+            )
+            for pk in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+    DigestState.objects.filter(user_id__in=user_ids).update(
+        sent_until=until, last_item_id=last_item_id
+    )
+
+
+def send_digests(batch_size=DIGEST_BATCH_SIZE, rate=None, now=None):
+    """Рассылает дайджесты всем, кому пора, возвращает число писем.
+
+    Граница подписчиков пачки сдвигается после отправки её писем:
+    при сбое письма пачки могут уйти повторно, но не потеряются.
+    Границу получают и подписчики без новых постов, иначе каждый
+    запуск проверял бы их снова.
+    """
+    until = now or timezone.now()
+    last_item_id = FeedItem.objects.aggregate(last=Max('pk'))['last'] or 0
+    templates = [get_template(name) for name in TEMPLATES]
+    limiter = RateLimiter(
+        settings.EMAIL_RATE_LIMIT if rate is None else rate
+    )
+    sent = 0
+    with get_connection() as connection:
+        for users in _recipients(until, batch_size):
+            grouped = _new_items(users, until, last_item_id)
+            recipients = [user for user in users if user.pk in grouped]
+            for user in recipients:
+                limiter.wait()
+                connection.send_messages(
+                    [_message(user, grouped[user.pk], templates)]
+                )
+            _mark_sent([user.pk for user in users], until, last_item_id)
+            sent += len(recipients)
+    return sent
@@ -0,0 +1,113 @@
+from django.db import connection
+from django.db.models import F, FilteredRelation, Max, Q
+
+from core.tasks import task
+
+from .cache import bump_versions, version_key
+from .models import FeedItem, Follow, Post
+
+FEED_BATCH_SIZE = 500
+FEED_CURSOR_KEYS = ('feed_date', 'feed_post')
+
+
+def _copy_to_feeds(select, params):
+    """Вставляет в ленты строки (user_id, post_id, pub_date) запроса
+    ``select`` одним INSERT ... SELECT, не создавая объектов в Python.
+
+    Возвращает число добавленных записей.
+    """
+    ops = connection.ops
+    insert = ops.insert_statement(ignore_conflicts=True)
+    suffix = ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{insert} {FeedItem._meta.db_table} '
+            f'(user_id, post_id, pub_date) {select} {suffix}',
+            params,
+        )
+        return cursor.rowcount
+
+
+def add_authors_to_feed(user_id, author_ids):
+    """Переносит в ленту подписчика все посты авторов ``author_ids``."""
+    author_ids = list(author_ids)
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    _copy_to_feeds(
+        f'SELECT %s, id, pub_date FROM {Post._meta.db_table} '
+        f'WHERE author_id IN ({placeholders})',
+        [user_id, *author_ids],
+    )
+
+
+def add_posts_to_feeds(post_ids):
+    """Добавляет посты ``post_ids`` в ленты подписчиков их авторов
+    одним запросом."""
+    post_ids = list(post_ids)
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    return _copy_to_feeds(
+        'SELECT follow.user_id, post.id, post.pub_date '
+        f'FROM {Follow._meta.db_table} follow '
+        f'JOIN {Post._meta.db_table} post '
+        'ON follow.author_id = post.author_id '
+        f'WHERE post.id IN ({placeholders})',
+        post_ids,
+    )
+
+
+@task(key='fan-out:{0}')
+def fan_out_post(post_id):
+    """Добавляет пост в ленты всех подписчиков автора.
+
+    Задача может выполниться позже сохранения поста, поэтому меняет
+    общую версию лент: по ней проверяются ETag лент подписок.
+    """
+    _copy_to_feeds(
+        'SELECT follow.user_id, post.id, post.pub_date '
+        f'FROM {Follow._meta.db_table} follow '
+        f'JOIN {Post._meta.db_table} post '
+        'ON follow.author_id = post.author_id WHERE post.id = %s',
+        [post_id],
+    )
+    bump_versions(version_key('feed'))
+
+
+def remove_authors_from_feed(user_id, author_ids):
+    """Убирает из ленты подписчика посты авторов ``author_ids``."""
+    FeedItem.objects.filter(
+        user_id=user_id,
+        post__author_id__in=author_ids,
+    ).delete()
+
+
+def get_feed(user):
+    """Посты ленты подписок в порядке публикации."""
+    return Post.objects.annotate(
+        feed=FilteredRelation(
+            'feed_entries', condition=Q(feed_entries__user=user)
+        ),
+    ).filter(
+        feed__isnull=False
+    ).annotate(
+        feed_date=F('feed__pub_date'),
+        feed_post=F('feed__post_id'),
+    ).order_by('-feed_date', '-feed_post')
+
+
+def backfill_feeds(batch_size=FEED_BATCH_SIZE, after=0):
+    """Заполняет ленты по подпискам с ключом больше ``after``,
+    по умолчанию - по всем.
+
+    Подписки обрабатываются диапазонами ключей по ``batch_size``.
+    """
+    last = Follow.objects.aggregate(last=Max('pk'))['last'] or 0
+    select = (
+        'SELECT follow.user_id, post.id, post.pub_date '
+        f'FROM {Follow._meta.db_table} follow '
+        f'JOIN {Post._meta.db_table} post '
+        'ON post.author_id = follow.author_id '
+        'WHERE follow.id > %s AND follow.id <= %s'
+    )
+    return sum(
+        _copy_to_feeds(select, [start, start + batch_size])
+        for start in range(after, last, batch_size)
+    )
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from sorl.thumbnail import get_thumbnail
+
+from core.metrics import timer
+from core.tasks import task
+
+from .cache import bump_versions, version_key
+from .imaging import EXTENSIONS, encode_variants, supported_formats
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_process_pool = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_PROCESSES
+        )
+    return _process_pool
+
+
+def generate_variants(image):
+    """Сохраняет рядом с картинкой её варианты для srcset.
+
+    Кодирование выполняется в пуле процессов, чтобы не занимать
+    интерпретатор веб-процесса.
+    """
+    formats = supported_formats(settings.POST_IMAGE_VARIANT_FORMATS)
+    if not formats:
+        return {}
+    with image.open('rb') as source:
+        data = source.read()
+    args = (
+        data,
+        settings.POST_IMAGE_VARIANT_WIDTHS,
+        settings.POST_IMAGE_VARIANT_RATIO,
+        formats,
+    )
+    if settings.IMAGE_VARIANT_PROCESSES:
+        encoded = get_process_pool().submit(encode_variants, *args).result()
+    else:
+        encoded = encode_variants(*args)
+    base = os.path.splitext(image.name)[0]
+    variants = {}
+    for width, fmt, content in encoded:
+        name = image.storage.save(
+            f'{base}_{width}w.{EXTENSIONS[fmt]}', ContentFile(content)
+        )
+        variants.setdefault(fmt, []).append(
+            (width, image.storage.url(name))
+        )
+    return variants
+
+
+@task(key='images:{0}')
+def generate_images(post_id):
+    """Готовит миниатюры и варианты картинки и сохраняет их в посте."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    with timer('thumbnail_seconds'):
+        urls, variants = _render_images(post.image)
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(urls),
+        image_variants=json.dumps(variants),
+    )
+    if updated:
+        bump_versions(version_key('post', post_id), version_key('index'))
+
+
+def _render_images(image):
+    urls = {
+        name: get_thumbnail(image, geometry, **options).url
+        for name, (geometry, options) in settings.POST_THUMBNAIL_SIZES.items()
+    }
+    return urls, generate_variants(image)
+
+
+def _generate_logged(post_id):
+    try:
+        generate_images(post_id)
+    except Exception:
+        logger.exception('Не удалось подготовить картинки поста %s', post_id)
+
+
+def _generate_in_background(post_id):
+    try:
+        _generate_logged(post_id)
+    finally:
+        connection.close()
+
+
+def generate_pending_images(workers):
+    """Готовит картинки постов, у которых ещё нет миниатюр.
+
+    Возвращает число обработанных постов.
+    """
+    pending = Post.objects.exclude(image='').filter(
+        thumbnails=''
+    ).values_list('pk', flat=True)
+    if workers < 1:
+        return sum(1 for _ in map(_generate_logged, pending.iterator()))
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix='thumbnails'
+    ) as pool:
+        return sum(
+            1 for _ in pool.map(_generate_in_background, pending.iterator())
+        )
+
+
+def schedule_images(post):
+    """Ставит подготовку картинок в очередь задач, а если задачи
+    выполняются сразу - в пул потоков после фиксации транзакции."""
+    if not post.image:
+        return
+    if not settings.TASKS_EAGER:
+        generate_images.enqueue(post.pk)
+        return
+    if not settings.THUMBNAIL_WORKERS:
+        generate_images(post.pk)
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(_generate_in_background, post.pk)
+    )
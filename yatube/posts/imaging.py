@@ -0,0 +1,55 @@
+"""Кодирование вариантов картинок постов.
+
+Модуль не зависит от Django: его функции выполняются в пуле процессов.
+"""
+import io
+
+from PIL import Image, ImageOps
+
+try:
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+MIME_TYPES = {
+    'avif': 'image/avif',
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+}
+EXTENSIONS = {
+    'avif': 'avif',
+    'webp': 'webp',
+    'jpeg': 'jpg',
+}
+SAVE_OPTIONS = {
+    'avif': {'quality': 60},
+    'webp': {'quality': 75, 'method': 4},
+    'jpeg': {'quality': 80, 'optimize': True, 'progressive': True},
+}
+
+
+def supported_formats(formats):
+    """Форматы, которые умеет записывать установленная сборка Pillow."""
+    Image.init()
+    return [fmt for fmt in formats if fmt.upper() in Image.SAVE]
+
+
+def encode_variants(data, widths, ratio, formats):
+    """Кадрирует картинку под ``ratio`` и кодирует её во всех ширинах
+    и форматах. Возвращает список ``(ширина, формат, байты)``.
+
+    Ширины больше исходной пропускаются, кроме наименьшей.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+    usable = [width for width in widths if width <= image.width]
+    variants = []
+    for width in usable or [min(widths)]:
+        resized = ImageOps.fit(
+            image, (width, round(width / ratio)), Image.LANCZOS
+        )
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt.upper(), **SAVE_OPTIONS[fmt])
+            variants.append((width, fmt, buffer.getvalue()))
+    return variants
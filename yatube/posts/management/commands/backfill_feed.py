@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed import FEED_BATCH_SIZE, backfill_feeds
+from posts.models import FeedItem
+
+
+class Command(BaseCommand):
+    help = 'Заполняет ленты подписок по существующим подпискам.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Предварительно очистить все ленты.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=FEED_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            FeedItem.objects.all().delete()
+        created = backfill_feeds(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Добавлено записей в ленты: {created}')
+        )
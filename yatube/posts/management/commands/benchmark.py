@@ -0,0 +1,127 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from posts.benchmark import (
+    DATA_DEFAULTS,
+    PERCENTILES,
+    compare,
+    generate_data,
+    run_scenarios,
+)
+
+BASELINE_PATH = os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json')
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет страницы постов на синтетических данных во временной '
+        'базе и сравнивает результат с сохранённым базовым.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DATA_DEFAULTS.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--warm',
+            action='store_true',
+            help='Не очищать кэш перед каждым запросом.',
+        )
+        parser.add_argument('--baseline', default=BASELINE_PATH)
+        parser.add_argument(
+            '--save-baseline',
+            action='store_true',
+            help='Записать результат как новый базовый.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help='Допустимый рост задержек относительно базового.',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('Нужно хотя бы два запроса на страницу.')
+        data = {name: options[name] for name in DATA_DEFAULTS}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                rows = generate_data(**data)
+                self.stderr.write(f'Сгенерировано строк: {rows}')
+                results = run_scenarios(
+                    options['requests'],
+                    warmup=options['warmup'],
+                    cold=not options['warm'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        self.report(results)
+        report = {
+            'data': data,
+            'cold': not options['warm'],
+            'results': results,
+        }
+        if options['save_baseline']:
+            os.makedirs(os.path.dirname(options['baseline']), exist_ok=True)
+            with open(options['baseline'], 'w') as stream:
+                json.dump(report, stream, indent=2, sort_keys=True)
+                stream.write('\n')
+            self.stdout.write(
+                self.style.SUCCESS(f"Базовый замер: {options['baseline']}")
+            )
+            return
+        self.check_baseline(report, options)
+
+    def report(self, results):
+        columns = (*PERCENTILES, 'queries', 'rps')
+        self.stdout.write(
+            f"{'страница':<14}"
+            + ''.join(f'{column:>10}' for column in columns)
+        )
+        for name, stats in results.items():
+            self.stdout.write(
+                f'{name:<14}'
+                + ''.join(f'{stats[column]:>10.1f}' for column in columns)
+            )
+
+    def check_baseline(self, report, options):
+        if not os.path.exists(options['baseline']):
+            self.stdout.write('Базовый замер не найден, сравнение пропущено.')
+            return
+        with open(options['baseline']) as stream:
+            baseline = json.load(stream)
+        if (baseline['data'], baseline['cold']) != (
+            report['data'], report['cold']
+        ):
+            raise CommandError(
+                'Базовый замер снят на других данных или режиме кэша.'
+            )
+        regressions = compare(
+            report['results'], baseline['results'], options['tolerance']
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет.'))
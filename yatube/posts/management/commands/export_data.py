@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (
+    export_rows,
+    file_format,
+    parse_targets,
+    write_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии и подписки в JSONL '
+        'или CSV (по расширению файла).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets',
+            nargs='+',
+            metavar='вид=файл',
+            help='Например posts=posts.jsonl comments=comments.csv',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            targets = parse_targets(options['targets'])
+        except ValueError as error:
+            raise CommandError(error)
+        for kind, path in targets:
+            started = time.monotonic()
+            with open(path, 'w', encoding='utf-8', newline='') as stream:
+                count = write_rows(
+                    stream, file_format(path), kind, export_rows(kind)
+                )
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: выгружено {count} строк в {path} '
+                f'за {elapsed:.1f} с'
+            ))
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import (
+    IMAGE_WORKERS,
+    IMPORT_BATCH_SIZE,
+    Importer,
+    file_format,
+    parse_targets,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты, комментарии и подписки из JSONL '
+        'или CSV пачками, затем обновляет ленты, счётчики, поисковый '
+        'индекс и миниатюры.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets',
+            nargs='+',
+            metavar='вид=файл',
+            help='Например groups=groups.csv posts=posts.jsonl',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--media-root',
+            help='Каталог с картинками постов для копирования в хранилище.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=IMAGE_WORKERS,
+            help='Потоки для копирования картинок и миниатюр.',
+        )
+
+    def progress(self, kind, count, elapsed):
+        rate = count / elapsed if elapsed else 0
+        self.stderr.write(f'{kind}: {count} строк, {rate:.0f} строк/с')
+
+    def handle(self, *args, **options):
+        try:
+            targets = parse_targets(options['targets'])
+        except ValueError as error:
+            raise CommandError(error)
+        importer = Importer(
+            batch_size=options['batch_size'],
+            media_root=options['media_root'],
+            workers=options['workers'],
+            progress=self.progress if options['verbosity'] else None,
+        )
+        for kind, path in targets:
+            started = time.monotonic()
+            with open(path, encoding='utf-8', newline='') as stream:
+                rows = read_rows(stream, file_format(path))
+                count = importer.run(kind, rows)
+            elapsed = time.monotonic() - started
+            rate = count / elapsed if elapsed else 0
+            self.stdout.write(self.style.SUCCESS(
+                f'{kind}: загружено {count} строк за {elapsed:.1f} с '
+                f'({rate:.0f} строк/с)'
+            ))
+        started = time.monotonic()
+        images = importer.finish()
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты, счётчики и индекс обновлены, картинок: {images}, '
+            f'пропущено строк: {importer.skipped}, '
+            f'{time.monotonic() - started:.1f} с'
+        ))
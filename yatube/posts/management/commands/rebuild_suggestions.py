@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import SUGGESTIONS_BATCH_SIZE, rebuild_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов для всех пользователей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=SUGGESTIONS_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_suggestions(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Записано рекомендаций: {written}')
+        )
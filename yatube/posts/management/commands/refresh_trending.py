@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import refresh_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает популярные посты и группы по активности '
+        'с прошлого пересчёта.'
+    )
+
+    def handle(self, *args, **options):
+        updated = refresh_trending()
+        self.stdout.write(
+            self.style.SUCCESS(f'Постов с новой активностью: {updated}')
+        )
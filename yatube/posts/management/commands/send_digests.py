@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.digests import DIGEST_BATCH_SIZE, send_digests
+
+
+class Command(BaseCommand):
+    help = 'Рассылает подписчикам дайджесты новых постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DIGEST_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            help='Писем в секунду, по умолчанию EMAIL_RATE_LIMIT.',
+        )
+
+    def handle(self, *args, **options):
+        sent = send_digests(
+            batch_size=options['batch_size'], rate=options['rate']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def install_search(apps, schema_editor):
+    from posts.search import get_backend
+
+    backend = get_backend(schema_editor.connection.vendor)
+    with schema_editor.connection.cursor() as cursor:
+        backend.install(cursor)
+        backend.rebuild(cursor)
+
+
+def uninstall_search(apps, schema_editor):
+    from posts.search import get_backend
+
+    backend = get_backend(schema_editor.connection.vendor)
+    with schema_editor.connection.cursor() as cursor:
+        backend.uninstall(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_suggestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingGroup',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Group', verbose_name='группа')),
+                ('score', models.FloatField(db_index=True, verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'Популярная группа',
+                'verbose_name_plural': 'Популярные группы',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingPost',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='posts.Post', verbose_name='пост')),
+                ('score', models.FloatField(db_index=True, verbose_name='Популярность')),
+            ],
+            options={
+                'verbose_name': 'Популярный пост',
+                'verbose_name_plural': 'Популярные посты',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_comment_id', models.PositiveIntegerField(default=0, verbose_name='Последний учтённый комментарий')),
+                ('last_follow_id', models.PositiveIntegerField(default=0, verbose_name='Последняя учтённая подписка')),
+                ('refreshed', models.DateTimeField(null=True, verbose_name='Время пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Состояние популярного',
+                'verbose_name_plural': 'Состояния популярного',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:55
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_last_items(apps, schema_editor):
+    DigestState = apps.get_model('posts', 'DigestState')
+    FeedItem = apps.get_model('posts', 'FeedItem')
+    # Уже разосланы записи ленты с постами до старой границы по дате.
+    sent = FeedItem.objects.filter(
+        user_id=OuterRef('user_id'), pub_date__lte=OuterRef('sent_until')
+    ).order_by('-pk').values('pk')[:1]
+    DigestState.objects.update(last_item_id=Coalesce(Subquery(sent), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digeststate',
+            name='last_item_id',
+            field=models.PositiveIntegerField(default=0, verbose_name='Последняя отправленная запись ленты'),
+        ),
+        migrations.RunPython(fill_last_items, migrations.RunPython.noop),
+    ]
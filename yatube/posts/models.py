@@ -1,8 +1,12 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
 from core.models import CreatedModel
 
+from .imaging import MIME_TYPES
+
 
 User = get_user_model()
 
@@ -57,12 +61,62 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    thumbnails = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Миниатюры',
+        help_text='Адреса готовых миниатюр картинки в формате JSON'
+    )
+    image_variants = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name='Варианты картинки',
+        help_text='Адреса вариантов картинки по форматам в формате JSON'
+    )
 
     def __str__(self):
         return self.text
 
+    @property
+    def thumbnail_urls(self):
+        return json.loads(self.thumbnails) if self.thumbnails else {}
+
+    @property
+    def image_sources(self):
+        """Пары (MIME-тип, srcset) для тегов source в порядке форматов."""
+        variants = json.loads(self.image_variants or '{}')
+        return [
+            (
+                MIME_TYPES[fmt],
+                ', '.join(f'{url} {width}w' for width, url in variants[fmt]),
+            )
+            for fmt in MIME_TYPES
+            if fmt in variants
+        ]
+
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date',),
+                name='posts_post_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='posts_post_author_pub_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='posts_post_group_pub_idx',
+            ),
+        )
         verbose_name_plural = 'Посты'
         verbose_name = 'Пост'
 
@@ -85,6 +139,12 @@ class Comment(CreatedModel):
 
     class Meta:
         ordering = ('-created',)
+        indexes = (
+            models.Index(
+                fields=('post', '-created'),
+                name='posts_comment_post_created_idx',
+            ),
+        )
         verbose_name_plural = 'Комментарии'
         verbose_name = 'Комментарий'
 
@@ -104,5 +164,179 @@ class Follow(models.Model):
     )
 
     class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
         verbose_name_plural = 'Подписки'
         verbose_name = 'Подписка'
+
+
+class FeedItem(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='подписчик',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='пост',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации'
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        unique_together = ('user', 'post')
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='posts_feed_user_pub_post_idx',
+            ),
+        )
+        verbose_name_plural = 'Записи ленты'
+        verbose_name = 'Запись ленты'
+
+
+class UserStats(models.Model):
+    """Счётчики постов и подписок пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='пользователь',
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество подписок'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Счётчики пользователей'
+        verbose_name = 'Счётчики пользователя'
+
+
+class DigestState(models.Model):
+    """Граница уже разосланных подписчику постов."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='digest',
+        verbose_name='подписчик',
+    )
+    sent_until = models.DateTimeField(
+        verbose_name='Отправлены посты до'
+    )
+    last_item_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Последняя отправленная запись ленты'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Состояния рассылки'
+        verbose_name = 'Состояние рассылки'
+
+
+class Suggestion(models.Model):
+    """Автор, рекомендованный пользователю для подписки."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name='пользователь',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggested_to',
+        verbose_name='автор',
+    )
+    score = models.FloatField(
+        verbose_name='Вес'
+    )
+
+    class Meta:
+        unique_together = ('user', 'author')
+        indexes = (
+            models.Index(
+                fields=('user', '-score'),
+                name='posts_suggestion_score_idx',
+            ),
+        )
+        verbose_name_plural = 'Рекомендации'
+        verbose_name = 'Рекомендация'
+
+
+class TrendingPost(models.Model):
+    """Популярность поста с затуханием во времени."""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='пост',
+    )
+    score = models.FloatField(
+        db_index=True,
+        verbose_name='Популярность'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Популярные посты'
+        verbose_name = 'Популярный пост'
+
+
+class TrendingGroup(models.Model):
+    """Популярность группы с затуханием во времени."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending',
+        verbose_name='группа',
+    )
+    score = models.FloatField(
+        db_index=True,
+        verbose_name='Популярность'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Популярные группы'
+        verbose_name = 'Популярная группа'
+
+
+class TrendingState(models.Model):
+    """Граница активности, уже учтённой в популярности."""
+    last_comment_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Последний учтённый комментарий'
+    )
+    last_follow_id = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Последняя учтённая подписка'
+    )
+    refreshed = models.DateTimeField(
+        null=True,
+        verbose_name='Время пересчёта'
+    )
+
+    class Meta:
+        verbose_name_plural = 'Состояния популярного'
+        verbose_name = 'Состояние популярного'
@@ -0,0 +1,283 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .cache import cached_fragment, get_versions
+
+CURSOR_KEYS = ('pub_date', 'pk')
+NEXT = 'n'
+PREVIOUS = 'p'
+# Выше этого числа строк точный COUNT(*) заменяется оценкой планировщика.
+COUNT_ESTIMATE_THRESHOLD = 100_000
+# Границы целого ключа, которое база сравнивает без переполнения.
+MIN_CURSOR_PK = -2 ** 63
+MAX_CURSOR_PK = 2 ** 63 - 1
+
+
+def encode_cursor(direction, values):
+    values = [
+        value.isoformat() if hasattr(value, 'isoformat') else value
+        for value in values
+    ]
+    raw = json.dumps([direction, *values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, keys_count):
+    """Возвращает направление и значения ключей или None.
+
+    Последний ключ курсора - целый id, предыдущие - даты; значения
+    другого типа считаются ошибкой и до запроса к базе не доходят.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, *values = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError, binascii.Error):
+        return None
+    if direction not in (NEXT, PREVIOUS) or len(values) != keys_count:
+        return None
+    *dates, pk = values
+    if (
+        not isinstance(pk, int) or isinstance(pk, bool)
+        or not MIN_CURSOR_PK <= pk <= MAX_CURSOR_PK
+    ):
+        return None
+    try:
+        dates = [parse_datetime(value) for value in dates]
+    except (TypeError, ValueError):
+        return None
+    if None in dates:
+        return None
+    return direction, [*dates, pk]
+
+
+class CursorPage(Sequence):
+    """Страница курсорного паджинатора."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        # Курсор за концом списка даёт пустую страницу без записей,
+        # от которых можно отсчитать соседнюю.
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.cursor_for(self.object_list[0], PREVIOUS)
+
+
+class CursorPaginator:
+    """Постраничный вывод по ключу без COUNT(*) и OFFSET.
+
+    Записи упорядочиваются по убыванию ключей ``keys``, страница
+    выбирается условием на значения ключей последней показанной записи,
+    поэтому глубокие страницы обходятся так же дёшево, как первая.
+    """
+
+    def __init__(self, object_list, per_page, keys=CURSOR_KEYS):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.keys = tuple(keys)
+
+    def cursor_for(self, obj, direction):
+        return encode_cursor(
+            direction, [getattr(obj, key) for key in self.keys]
+        )
+
+    def _seek(self, values, lookup):
+        condition = Q()
+        for position, key in enumerate(self.keys):
+            exact = {k: v for k, v in zip(self.keys[:position], values)}
+            exact[f'{key}__{lookup}'] = values[position]
+            condition |= Q(**exact)
+        return condition
+
+    def get_page(self, cursor=None):
+        """Возвращает страницу по курсору; ошибочный курсор - первая."""
+        decoded = decode_cursor(cursor, len(self.keys)) if cursor else None
+        descending = [f'-{key}' for key in self.keys]
+        if decoded is None:
+            rows = list(
+                self.object_list.order_by(*descending)[:self.per_page + 1]
+            )
+            return CursorPage(
+                rows[:self.per_page], self,
+                has_next=len(rows) > self.per_page,
+                has_previous=False,
+            )
+        direction, values = decoded
+        if direction == NEXT:
+            rows = list(
+                self.object_list.filter(self._seek(values, 'lt'))
+                .order_by(*descending)[:self.per_page + 1]
+            )
+            return CursorPage(
+                rows[:self.per_page], self,
+                has_next=len(rows) > self.per_page,
+                has_previous=True,
+            )
+        rows = list(
+            self.object_list.filter(self._seek(values, 'gt'))
+            .order_by(*self.keys)[:self.per_page + 1]
+        )
+        return CursorPage(
+            rows[:self.per_page][::-1], self,
+            has_next=True,
+            has_previous=len(rows) > self.per_page,
+        )
+
+
+def _sqlite_estimate(queryset, cursor):
+    """Число строк таблицы из статистики ANALYZE.
+
+    Для выборок с условием SQLite оценки не даёт.
+    """
+    if queryset.query.where:
+        return None
+    cursor.execute(
+        'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+        [queryset.model._meta.db_table],
+    )
+    row = cursor.fetchone()
+    return int(row[0].split()[0]) if row else None
+
+
+def _postgres_estimate(queryset, cursor):
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+ESTIMATORS = {
+    'sqlite': _sqlite_estimate,
+    'postgresql': _postgres_estimate,
+}
+
+
+def estimate_count(queryset):
+    """Оценка числа строк выборки без её обхода или None."""
+    connection = connections[queryset.db]
+    estimator = ESTIMATORS.get(connection.vendor)
+    if estimator is None:
+        return None
+    try:
+        with transaction.atomic(using=queryset.db), connection.cursor() as c:
+            return estimator(queryset, c)
+    except DatabaseError:
+        # Например, в SQLite ещё не выполнялся ANALYZE.
+        return None
+
+
+class CountingPaginator(Paginator):
+    """Paginator с кэшированным и приблизительным числом записей.
+
+    С ``count_key`` число записей кэшируется до смены версий
+    ``version_keys``. На больших выборках вместо точного COUNT(*)
+    используется оценка планировщика, тогда ``count_is_estimate``.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count_key=None,
+                 version_keys=(), **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.version_keys = tuple(version_keys)
+
+    def _count(self):
+        """Точный счёт не дальше порога, выше - оценка планировщика."""
+        if isinstance(self.object_list, QuerySet):
+            bounded = self.object_list.order_by().values('pk')[
+                :COUNT_ESTIMATE_THRESHOLD + 1
+            ].count()
+            if bounded <= COUNT_ESTIMATE_THRESHOLD:
+                return bounded, False
+            estimate = estimate_count(self.object_list)
+            if estimate is not None:
+                return max(estimate, bounded), True
+        count = Paginator.count.func(self)
+        return count, getattr(self.object_list, 'count_is_estimate', False)
+
+    @cached_property
+    def _counted(self):
+        if self.count_key is None:
+            return self._count()
+        return cached_fragment(
+            f'count:{self.count_key}',
+            get_versions(*self.version_keys),
+            self._count,
+        )
+
+    @property
+    def count(self):
+        return self._counted[0]
+
+    @property
+    def count_is_estimate(self):
+        return self._counted[1]
+
+    def get_elided_page_range(self, number=1, on_each_side=2, on_ends=1):
+        """Номера страниц вокруг ``number`` и по краям с пропусками
+        ``ELLIPSIS``: на миллионах постов все номера не выводятся.
+
+        При оценочном числе записей последние страницы могут оказаться
+        пустыми, поэтому ссылки на них не выводятся.
+        """
+        number = self.validate_number(number)
+        last = self.num_pages
+        if last <= (on_each_side + on_ends) * 2 and not self.count_is_estimate:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if self.count_is_estimate:
+            yield from range(number + 1, min(number + on_each_side, last) + 1)
+            if number + on_each_side < last:
+                yield self.ELLIPSIS
+        elif number < last - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(last - on_ends + 1, last + 1)
+        else:
+            yield from range(number + 1, last + 1)
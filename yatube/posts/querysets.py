@@ -0,0 +1,29 @@
+"""Выборки лент, общие для HTML-страниц и API."""
+from .feed import get_feed
+from .models import Post
+
+
+def index_posts():
+    return Post.objects.select_related('author', 'group')
+
+
+def trending_posts():
+    return Post.objects.filter(
+        trending__isnull=False
+    ).select_related('author', 'group').order_by('-trending__score')
+
+
+def group_posts(group):
+    return group.posts.select_related('author')
+
+
+def author_posts(author):
+    return author.posts.select_related('group')
+
+
+def follow_posts(user):
+    return get_feed(user).select_related('author', 'group')
+
+
+def post_comments(post):
+    return post.comments.select_related('author')
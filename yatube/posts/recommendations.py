@@ -0,0 +1,147 @@
+"""Рекомендации авторов для подписки по графу подписок.
+
+Подписки - разреженная матрица A: A[u][a] = 1, если u подписан на a.
+Вес кандидата x для пользователя u - элемент строки u суммы
+
+- A·A - друзья друзей: на x подписаны авторы, которых читает u;
+- A·Aᵀ·A - совместные подписки: на x подписаны читатели тех же
+  авторов, что и u. Общий автор входит с весом 1/число его
+  подписчиков: популярный автор, которого читают все, почти ничего
+  не говорит о вкусах, а самых популярных авторов соединение
+  пропускает вовсе, чтобы не перемножать огромные строки.
+
+Произведения считаются в базе соединениями таблицы подписок по
+диапазонам пользователей, лучшие ``SUGGESTIONS_PER_USER`` кандидатов
+выбираются оконной функцией и записываются одним INSERT ... SELECT.
+Из строк A за каждым промежуточным пользователем берутся только
+``PATHS_PER_USER`` последних подписок, поэтому число путей растёт
+с числом подписок пользователя, а не с их произведением.
+
+Своя подписка пользователя пересчитывает его рекомендации отложенной
+задачей ``refresh_user``: запрос подписки не ждёт пересчёта, а частые
+подписки сводятся в один пересчёт. Уже прочитанные авторы
+отбрасываются при чтении, остальных обновляет ``rebuild_suggestions``.
+"""
+from django.db import connection, transaction
+from django.db.models import Max
+
+from core.tasks import task
+
+from .cache import bump_versions, version_key
+from .models import Follow, Suggestion, User, UserStats
+
+SUGGESTIONS_PER_USER = 20
+SHOWN_SUGGESTIONS = 5
+SUGGESTIONS_BATCH_SIZE = 200
+FRIENDS_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 1.0
+# Общие авторы с большим числом подписчиков не учитываются
+# в совместных подписках.
+MAX_SHARED_FOLLOWERS = 1000
+# Подписок и подписчиков на промежуточного пользователя в путях.
+PATHS_PER_USER = 50
+# Пересчёт после подписки ждёт столько секунд, собирая следующие.
+REFRESH_DELAY = 60
+
+
+def _latest_follows(column, within):
+    """Последние ``PATHS_PER_USER`` подписок каждого значения ``column``
+    из подзапроса ``within``."""
+    return (
+        '(SELECT user_id, author_id FROM ('
+        'SELECT user_id, author_id, ROW_NUMBER() OVER ('
+        f'PARTITION BY {column} ORDER BY id DESC'
+        f') AS place FROM {Follow._meta.db_table} '
+        f'WHERE {column} IN ({within})'
+        f') numbered WHERE place <= {PATHS_PER_USER})'
+    )
+
+
+def _paths_sql():
+    """Пути от пользователей с id в (%s, %s] к кандидатам. Все
+    параметры запроса - границы этого диапазона."""
+    follow = Follow._meta.db_table
+    stats = UserStats._meta.db_table
+    authors = (
+        f'SELECT author_id FROM {follow} '
+        'WHERE user_id > %s AND user_id <= %s'
+    )
+    authors_follows = _latest_follows('user_id', authors)
+    readers = _latest_follows('author_id', authors)
+    readers_follows = _latest_follows(
+        'user_id', f'SELECT user_id FROM {readers} r'
+    )
+    return (
+        'SELECT f1.user_id, f2.author_id, '
+        f'{FRIENDS_WEIGHT} AS weight '
+        f'FROM {follow} f1 '
+        f'JOIN {authors_follows} f2 ON f2.user_id = f1.author_id '
+        'WHERE f1.user_id > %s AND f1.user_id <= %s '
+        'UNION ALL '
+        'SELECT f1.user_id, f3.author_id, '
+        f'{CO_FOLLOW_WEIGHT} / stats.followers_count '
+        f'FROM {follow} f1 '
+        f'JOIN {stats} stats ON stats.user_id = f1.author_id '
+        f'JOIN {readers} f2 ON f2.author_id = f1.author_id '
+        'AND f2.user_id <> f1.user_id '
+        f'JOIN {readers_follows} f3 ON f3.user_id = f2.user_id '
+        'WHERE f1.user_id > %s AND f1.user_id <= %s '
+        'AND stats.followers_count > 0 '
+        f'AND stats.followers_count <= {MAX_SHARED_FOLLOWERS}'
+    )
+
+
+def _refresh_range(start, end):
+    """Пересчитывает рекомендации пользователей с id в (start, end]."""
+    follow = Follow._meta.db_table
+    suggestion = Suggestion._meta.db_table
+    Suggestion.objects.filter(user_id__gt=start, user_id__lte=end).delete()
+    paths = _paths_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {suggestion} (user_id, author_id, score) '
+            'SELECT user_id, author_id, score FROM ('
+            'SELECT user_id, author_id, score, ROW_NUMBER() OVER ('
+            'PARTITION BY user_id ORDER BY score DESC, author_id'
+            ') AS place FROM ('
+            'SELECT path.user_id, path.author_id, SUM(path.weight) AS score '
+            f'FROM ({paths}) path '
+            'WHERE path.author_id <> path.user_id AND NOT EXISTS ('
+            f'SELECT 1 FROM {follow} f WHERE f.user_id = path.user_id '
+            'AND f.author_id = path.author_id'
+            ') GROUP BY path.user_id, path.author_id'
+            ') scored'
+            ') ranked WHERE place <= %s',
+            [start, end] * (paths.count('%s') // 2) + [SUGGESTIONS_PER_USER],
+        )
+        return cursor.rowcount
+
+
+@task(key='suggestions:{0}', delay=REFRESH_DELAY)
+def refresh_user(user_id):
+    """Пересчитывает рекомендации одного пользователя."""
+    _refresh_range(user_id - 1, user_id)
+    bump_versions(version_key('suggestions', user_id))
+
+
+def rebuild_suggestions(batch_size=SUGGESTIONS_BATCH_SIZE):
+    """Пересчитывает рекомендации всех пользователей диапазонами id
+    по ``batch_size``, возвращает число записанных рекомендаций."""
+    last = User.objects.aggregate(last=Max('pk'))['last'] or 0
+    written = 0
+    for start in range(0, last, batch_size):
+        with transaction.atomic():
+            written += _refresh_range(start, start + batch_size)
+    bump_versions(version_key('suggestions'))
+    return written
+
+
+def get_suggestions(user, limit=SHOWN_SUGGESTIONS):
+    """Лучшие рекомендации пользователя одним запросом по индексу.
+
+    Авторы, на которых пользователь подписался после пересчёта,
+    отбрасываются сразу.
+    """
+    return Suggestion.objects.filter(user=user).exclude(
+        author__in=Follow.objects.filter(user=user).values('author')
+    ).select_related('author').order_by('-score')[:limit]
@@ -0,0 +1,465 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+В SQLite индекс хранится в таблицах FTS5 и обновляется сигналами,
+в PostgreSQL используются GIN-индексы по ``to_tsvector`` прямо на
+таблицах постов и комментариев. Остальные СУБД ищут через ``LIKE``.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from core.tasks import task
+
+from .models import Comment, Post
+from .paginators import COUNT_ESTIMATE_THRESHOLD
+
+WORD = re.compile(r'\w+')
+# Совпадение в комментариях ранжируется ниже совпадения в тексте поста.
+COMMENT_WEIGHT = 0.5
+# По релевантности ранжируются только самые новые совпадения: оценка
+# всех строк с частым словом заняла бы секунды на миллионах постов.
+# Остальные совпадения выдаются после них, от новых к старым.
+SEARCH_CANDIDATES = 1000
+# Более короткое последнее слово ищется целиком, а не как префикс.
+MIN_PREFIX_LENGTH = 3
+
+
+def query_words(query):
+    return WORD.findall(query.lower())
+
+
+class SearchResults:
+    """Посты, найденные по запросу, в порядке релевантности.
+
+    Поддерживает ``count()`` и срезы, поэтому подходит для ``Paginator``.
+    Посты считаются не дальше ``COUNT_ESTIMATE_THRESHOLD``, тогда
+    ``count_is_estimate`` и ``count()`` - нижняя граница.
+    """
+
+    def __init__(self, backend, words):
+        self.backend = backend
+        self.words = words
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.words) if self.words else 0
+        return self._count
+
+    @property
+    def count_is_estimate(self):
+        return self.count() > COUNT_ESTIMATE_THRESHOLD
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        if not self.words or index.stop is not None and index.stop <= start:
+            return []
+        limit = None if index.stop is None else index.stop - start
+        ids = self.backend.ranked_ids(self.words, limit, start)
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+class SearchBackend:
+    """Поиск через ``LIKE``: без индекса, для прочих СУБД."""
+
+    def install(self, cursor):
+        pass
+
+    def uninstall(self, cursor):
+        pass
+
+    def index_post(self, post):
+        pass
+
+    def index_posts(self, post_ids):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def index_comments(self, comment_ids):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def rebuild(self, cursor):
+        pass
+
+    def _like(self, model, words):
+        condition = Q()
+        for word in words:
+            condition &= Q(text__icontains=word)
+        return model.objects.filter(condition)
+
+    def filter(self, queryset, query):
+        """Оставляет в ``queryset`` постов или комментариев совпадения."""
+        words = query_words(query)
+        if not words:
+            return queryset
+        return queryset.filter(
+            pk__in=self._matching_ids(queryset.model, words)
+        )
+
+    def _matching_ids(self, model, words):
+        return self._like(model, words).values('pk')
+
+    def count(self, words):
+        return self._matching_posts(words).values('pk')[
+            :COUNT_ESTIMATE_THRESHOLD + 1
+        ].count()
+
+    def ranked_ids(self, words, limit, offset):
+        posts = self._matching_posts(words).order_by('-pub_date', '-pk')
+        ids = posts.values_list('pk', flat=True)[offset:]
+        return list(ids[:limit] if limit is not None else ids)
+
+    def _matching_posts(self, words):
+        return Post.objects.filter(
+            Q(pk__in=self._like(Post, words).values('pk'))
+            | Q(pk__in=self._like(Comment, words).values('post_id'))
+        )
+
+    def search(self, query):
+        return SearchResults(self, query_words(query))
+
+
+class RankedSearchBackend(SearchBackend):
+    """Поиск по индексу с оценкой релевантности.
+
+    Оценивается окно из ``SEARCH_CANDIDATES`` самых новых совпадений
+    в постах и столько же в комментариях. Остальные совпадения идут
+    после окна от новых к старым, так что найти можно любой пост.
+    """
+
+    # Порядок постов окна по оценке ``rank`` их совпадений.
+    rank_order = None
+    # Значение LIMIT без ограничения.
+    no_limit = None
+
+    def _params(self, words):
+        """Параметры запроса ``_matches_sql``."""
+        raise NotImplementedError
+
+    def _matches_sql(self, limit=''):
+        """Совпадения (post_id, rank), не больше ``limit`` новейших
+        в постах и столько же в комментариях."""
+        raise NotImplementedError
+
+    def _post_ids_params(self, words, limit):
+        """Параметры запроса ``_post_ids_sql``."""
+        raise NotImplementedError
+
+    def _post_ids_sql(self):
+        """Различные post_id совпадений: не больше LIMIT наибольших
+        из постов и столько же из комментариев, без оценки ``rank``."""
+        raise NotImplementedError
+
+    def count(self, words):
+        # Каждая часть объединения ограничена порогом, поэтому больше
+        # порога выходит только при отброшенных совпадениях.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM ({self._post_ids_sql()}) AS matches',
+                self._post_ids_params(words, COUNT_ESTIMATE_THRESHOLD + 1),
+            )
+            return cursor.fetchone()[0]
+
+    def ranked_ids(self, words, limit, offset):
+        params = self._params(words)
+        window = self._matches_sql(f'LIMIT {SEARCH_CANDIDATES}')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM ({window}) AS matches '
+                f'GROUP BY post_id ORDER BY {self.rank_order}, post_id DESC',
+                params,
+            )
+            ranked = [row[0] for row in cursor.fetchall()]
+            end = None if limit is None else offset + limit
+            ids = ranked[offset:end]
+            if end is not None and end <= len(ranked):
+                return ids
+            skip = max(offset - len(ranked), 0)
+            # Из окна выбрасывается не больше len(ranked) постов, так что
+            # нужные посты есть среди стольких наибольших id каждой части.
+            take = None if limit is None else limit - len(ids)
+            bound = (
+                self.no_limit if limit is None
+                else skip + take + len(ranked)
+            )
+            cursor.execute(
+                f'SELECT post_id FROM ({self._post_ids_sql()}) AS matches '
+                'WHERE post_id NOT IN ('
+                f'SELECT post_id FROM ({window}) AS window_matches'
+                ') ORDER BY post_id DESC LIMIT %s OFFSET %s',
+                self._post_ids_params(words, bound) + params + [
+                    self.no_limit if take is None else take, skip,
+                ],
+            )
+            return ids + [row[0] for row in cursor.fetchall()]
+
+
+class SQLiteSearchBackend(RankedSearchBackend):
+    """Таблицы FTS5, ``rowid`` совпадает с ключом поста или комментария."""
+
+    tables = {
+        Post: 'posts_post_fts',
+        Comment: 'posts_comment_fts',
+    }
+
+    def install(self, cursor):
+        tokenizer = (
+            "tokenize = 'unicode61 remove_diacritics 2', "
+            f"prefix = '{MIN_PREFIX_LENGTH}'"
+        )
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS posts_post_fts '
+            f'USING fts5(text, {tokenizer})'
+        )
+        cursor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS posts_comment_fts '
+            f'USING fts5(text, post_id UNINDEXED, {tokenizer})'
+        )
+
+    def uninstall(self, cursor):
+        for table in self.tables.values():
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+    def index_post(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM posts_post_fts WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                'INSERT INTO posts_post_fts (rowid, text) VALUES (%s, %s)',
+                [post.pk, post.text],
+            )
+
+    def _index_rows(self, model, columns, ids):
+        """Переносит в индекс строки ``model`` с ключами ``ids``
+        двумя запросами."""
+        ids = list(ids)
+        if not ids:
+            return
+        table = self.tables[model]
+        placeholders = ', '.join(['%s'] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE rowid IN ({placeholders})', ids
+            )
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, {columns}) '
+                f'SELECT id, {columns} FROM {model._meta.db_table} '
+                f'WHERE id IN ({placeholders})',
+                ids,
+            )
+
+    def index_posts(self, post_ids):
+        self._index_rows(Post, 'text', post_ids)
+
+    def remove_post(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM posts_post_fts WHERE rowid = %s', [post_id]
+            )
+
+    def index_comment(self, comment):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM posts_comment_fts WHERE rowid = %s', [comment.pk]
+            )
+            cursor.execute(
+                'INSERT INTO posts_comment_fts (rowid, text, post_id) '
+                'VALUES (%s, %s, %s)',
+                [comment.pk, comment.text, comment.post_id],
+            )
+
+    def index_comments(self, comment_ids):
+        self._index_rows(Comment, 'text, post_id', comment_ids)
+
+    def remove_comment(self, comment_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'DELETE FROM posts_comment_fts WHERE rowid = %s', [comment_id]
+            )
+
+    def rebuild(self, cursor):
+        for table in self.tables.values():
+            cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(
+            'INSERT INTO posts_post_fts (rowid, text) '
+            'SELECT id, text FROM posts_post'
+        )
+        cursor.execute(
+            'INSERT INTO posts_comment_fts (rowid, text, post_id) '
+            'SELECT id, text, post_id FROM posts_comment'
+        )
+
+    def _match(self, words):
+        """Все слова обязательны, последнее - как префикс."""
+        terms = [f'"{word}"' for word in words]
+        if len(words[-1]) >= MIN_PREFIX_LENGTH:
+            terms[-1] += '*'
+        return ' '.join(terms)
+
+    def _matching_ids(self, model, words):
+        table = self.tables[model]
+        return RawSQL(
+            f'SELECT rowid FROM {table} WHERE {table} MATCH %s',
+            [self._match(words)],
+        )
+
+    rank_order = 'MIN(rank)'
+    no_limit = -1
+
+    def _params(self, words):
+        match = self._match(words)
+        return [match, match]
+
+    def _post_ids_params(self, words, limit):
+        return [self._match(words), limit] * 2
+
+    def _post_ids_sql(self):
+        return (
+            'SELECT * FROM ('
+            'SELECT rowid AS post_id FROM posts_post_fts '
+            'WHERE posts_post_fts MATCH %s ORDER BY rowid DESC LIMIT %s) '
+            'UNION '
+            'SELECT * FROM ('
+            'SELECT DISTINCT post_id FROM posts_comment_fts '
+            'WHERE posts_comment_fts MATCH %s '
+            'ORDER BY post_id DESC LIMIT %s)'
+        )
+
+    def _matches_sql(self, limit=''):
+        return (
+            'SELECT * FROM ('
+            'SELECT rowid AS post_id, bm25(posts_post_fts) AS rank '
+            'FROM posts_post_fts WHERE posts_post_fts MATCH %s '
+            f'ORDER BY rowid DESC {limit}) '
+            'UNION ALL '
+            'SELECT * FROM ('
+            f'SELECT post_id, bm25(posts_comment_fts) * {COMMENT_WEIGHT} '
+            'FROM posts_comment_fts WHERE posts_comment_fts MATCH %s '
+            f'ORDER BY rowid DESC {limit})'
+        )
+
+
+class PostgresSearchBackend(RankedSearchBackend):
+    """GIN-индексы по выражению ``to_tsvector``: синхронизировать
+    отдельную таблицу не нужно, индекс обновляет сама СУБД."""
+
+    config = 'russian'
+
+    def _vector(self, table):
+        return f"to_tsvector('{self.config}', {table}.text)"
+
+    def install(self, cursor):
+        for table in ('posts_post', 'posts_comment'):
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_search_idx '
+                f'ON {table} USING GIN ({self._vector(table)})'
+            )
+
+    def uninstall(self, cursor):
+        for table in ('posts_post', 'posts_comment'):
+            cursor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+
+    def _tsquery(self, words):
+        terms = list(words)
+        if len(words[-1]) >= MIN_PREFIX_LENGTH:
+            terms[-1] += ':*'
+        return ' & '.join(terms)
+
+    def _matches(self, table):
+        return (
+            f"{self._vector(table)} @@ to_tsquery('{self.config}', %s)"
+        )
+
+    def _matching_ids(self, model, words):
+        table = model._meta.db_table
+        return RawSQL(
+            f'SELECT id FROM {table} WHERE {self._matches(table)}',
+            [self._tsquery(words)],
+        )
+
+    rank_order = 'MAX(rank) DESC'
+
+    def _params(self, words):
+        return [self._tsquery(words)] * 4
+
+    def _post_ids_params(self, words, limit):
+        return [self._tsquery(words), limit] * 2
+
+    def _post_ids_sql(self):
+        return (
+            '(SELECT id AS post_id FROM posts_post '
+            f"WHERE {self._matches('posts_post')} "
+            'ORDER BY id DESC LIMIT %s) '
+            'UNION '
+            '(SELECT DISTINCT post_id FROM posts_comment '
+            f"WHERE {self._matches('posts_comment')} "
+            'ORDER BY post_id DESC LIMIT %s)'
+        )
+
+    def _matches_sql(self, limit=''):
+        rank = "ts_rank({vector}, to_tsquery('%s', %%s))" % self.config
+        return (
+            '(SELECT id AS post_id, '
+            f"{rank.format(vector=self._vector('posts_post'))} AS rank "
+            f"FROM posts_post WHERE {self._matches('posts_post')} "
+            f'ORDER BY id DESC {limit}) '
+            'UNION ALL '
+            '(SELECT post_id, '
+            f"{rank.format(vector=self._vector('posts_comment'))} "
+            f'* {COMMENT_WEIGHT} '
+            f"FROM posts_comment WHERE {self._matches('posts_comment')} "
+            f'ORDER BY id DESC {limit})'
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(vendor=None):
+    return BACKENDS.get(vendor or connection.vendor, SearchBackend)()
+
+
+def search_posts(query):
+    return get_backend().search(query)
+
+
+@task(key='search-post:{0}')
+def sync_post(post_id):
+    """Приводит индекс поста к его строке в базе: задача может
+    выполниться после следующих правок или удаления поста."""
+    post = Post.objects.filter(pk=post_id).only('text').first()
+    if post is None:
+        get_backend().remove_post(post_id)
+    else:
+        get_backend().index_post(post)
+
+
+@task(key='search-comment:{0}')
+def sync_comment(comment_id):
+    comment = Comment.objects.filter(pk=comment_id).only(
+        'text', 'post_id'
+    ).first()
+    if comment is None:
+        get_backend().remove_comment(comment_id)
+    else:
+        get_backend().index_comment(comment)
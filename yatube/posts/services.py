@@ -0,0 +1,69 @@
+"""Подписки на многих авторов одним действием.
+
+Подписки пакета создаются и удаляются одним запросом, без сигналов
+моделей: счётчики, ленты и версии кэша обновляются один раз на пакет,
+а не на каждого автора.
+"""
+from django.db import connections, router, transaction
+
+from . import counters, feed, recommendations
+from .cache import bump_on_commit, version_key
+from .models import Follow
+
+MAX_AUTHORS = 100
+
+
+def _delete_follows(user_id, author_ids):
+    """Удаляет подписки одним DELETE: ``delete()`` выбрал бы строки
+    и отправил post_delete на каждую."""
+    author_ids = list(author_ids)
+    placeholders = ', '.join(['%s'] * len(author_ids))
+    with connections[router.db_for_write(Follow)].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {Follow._meta.db_table} '
+            f'WHERE user_id = %s AND author_id IN ({placeholders})',
+            [user_id, *author_ids],
+        )
+
+
+def change_following(user, follow=(), unfollow=()):
+    """Подписывает ``user`` на авторов ``follow`` и отписывает
+    от ``unfollow`` (id существующих пользователей), возвращает id
+    авторов из обоих списков, на которых он подписан после изменения.
+
+    Подписка на себя пропускается, уже существующие подписки
+    и отсутствующие отписки ничего не меняют.
+    """
+    follow, unfollow = set(follow), set(unfollow)
+    if follow & unfollow:
+        raise ValueError('Автор указан и в подписках, и в отписках.')
+    follow.discard(user.pk)
+    with transaction.atomic():
+        # Решение принимается по основной базе: реплика могла ещё
+        # не получить последние подписки.
+        existing = set(
+            Follow.objects.using(router.db_for_write(Follow)).filter(
+                user=user, author_id__in=follow | unfollow
+            ).values_list('author_id', flat=True)
+        )
+        added = follow - existing
+        removed = unfollow & existing
+        if added:
+            Follow.objects.bulk_create(
+                [Follow(user=user, author_id=pk) for pk in added],
+                ignore_conflicts=True,
+            )
+            feed.add_authors_to_feed(user.pk, added)
+        if removed:
+            _delete_follows(user.pk, removed)
+            feed.remove_authors_from_feed(user.pk, removed)
+        changed = added | removed
+        if changed:
+            counters.refresh_follow_counts(user.pk, changed)
+            recommendations.refresh_user.enqueue(user.pk)
+            bump_on_commit(
+                version_key('feed', user.pk),
+                version_key('follow', user.pk),
+                *(version_key('follow', pk) for pk in changed),
+            )
+    return (existing | added) - removed
@@ -0,0 +1,91 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import counters, feed, recommendations, search
+from .cache import bump_on_commit, version_key
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None,
+               **kwargs):
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+    if update_fields != frozenset({'last_login'}):
+        bump_on_commit(
+            version_key('user', instance.pk), version_key('index')
+        )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_on_commit(
+        version_key('group', instance.pk),
+        version_key('index'),
+        version_key('trending'),
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    bump_on_commit(version_key('post', instance.pk), version_key('index'))
+    search.sync_post.enqueue(instance.pk)
+    if created and not raw:
+        counters.change_user_stats(instance.author_id, posts_count=1)
+        feed.fan_out_post.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_on_commit(version_key('post', instance.pk), version_key('index'))
+    counters.change_user_stats(instance.author_id, posts_count=-1)
+    search.sync_post.enqueue(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_comments_count(instance.post_id, 1)
+    bump_on_commit(
+        version_key('comments', instance.post_id), version_key('comments')
+    )
+    search.sync_comment.enqueue(instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments_count(instance.post_id, -1)
+    bump_on_commit(
+        version_key('comments', instance.post_id), version_key('comments')
+    )
+    search.sync_comment.enqueue(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.change_user_stats(instance.user_id, following_count=1)
+        counters.change_user_stats(instance.author_id, followers_count=1)
+        feed.add_authors_to_feed(instance.user_id, [instance.author_id])
+        recommendations.refresh_user.enqueue(instance.user_id)
+        bump_on_commit(
+            version_key('feed', instance.user_id),
+            version_key('follow', instance.user_id),
+            version_key('follow', instance.author_id),
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.change_user_stats(instance.user_id, following_count=-1)
+    counters.change_user_stats(instance.author_id, followers_count=-1)
+    feed.remove_authors_from_feed(
+        instance.user_id, [instance.author_id]
+    )
+    recommendations.refresh_user.enqueue(instance.user_id)
+    bump_on_commit(
+        version_key('feed', instance.user_id),
+        version_key('follow', instance.user_id),
+        version_key('follow', instance.author_id),
+    )
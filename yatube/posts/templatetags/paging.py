@@ -0,0 +1,13 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def page_window(page):
+    """Номера страниц для навигации: окно вокруг текущей, если
+    паджинатор умеет его строить, иначе все страницы."""
+    paginator = page.paginator
+    if hasattr(paginator, 'get_elided_page_range'):
+        return list(paginator.get_elided_page_range(page.number))
+    return paginator.page_range
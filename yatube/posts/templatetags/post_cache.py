@@ -0,0 +1,44 @@
+from django import template
+
+from posts.cache import listing_body, post_card_version, post_comments_version
+
+register = template.Library()
+
+
+@register.filter
+def card_version(post):
+    return post_card_version(post)
+
+
+@register.filter
+def comments_version(post):
+    return post_comments_version(post)
+
+
+class ListingCacheNode(template.Node):
+    def __init__(self, nodelist, keys):
+        self.nodelist = nodelist
+        self.keys = keys
+
+    def render(self, context):
+        return listing_body(
+            context['request'].get_full_path(),
+            self.keys.resolve(context),
+            lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag
+def listing_cache(parser, token):
+    """Кэширует тело ленты под версиями из переменной шаблона:
+
+    {% listing_cache cache_versions %}...{% endlisting_cache %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} ожидает один аргумент - список ключей версий'
+        )
+    nodelist = parser.parse(('endlisting_cache',))
+    parser.delete_first_token()
+    return ListingCacheNode(nodelist, parser.compile_filter(bits[1]))
@@ -0,0 +1,25 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts.cache import cached_fragment, get_versions, version_key
+from posts.trending import trending_groups
+
+register = template.Library()
+
+
+@register.simple_tag
+def trending_sidebar():
+    """Боковая панель популярных групп, общая для всех страниц.
+
+    Перестраивается после пересчёта популярности или изменения групп,
+    но не с каждым новым постом.
+    """
+    return mark_safe(cached_fragment(
+        'trending:sidebar',
+        get_versions(version_key('trending')),
+        lambda: render_to_string(
+            'posts/includes/trending_sidebar.html',
+            {'groups': trending_groups()},
+        ),
+    ))
@@ -21,6 +21,7 @@ ADD_COMMENT_POST_URL_NAME = 'posts:add_comment'
 PROFILE_FOLLOW_URL_NAME = 'posts:profile_follow'
 PROFILE_UNFOLLOW_URL_NAME = 'posts:profile_unfollow'
 PROFILE_FOLLOW_INDEX_URL_NAME = 'posts:follow_index'
+TRENDING_URL_NAME = 'posts:trending'
 
 INDEX_TEMPLATE = 'posts/index.html'
 GROUP_LIST_TEMPLATE = 'posts/group_list.html'
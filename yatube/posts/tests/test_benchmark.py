@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from ..benchmark import compare, generate_data, percentile, run_scenarios
+from ..models import Comment, FeedItem, Follow, Group, Post
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        generate_data(
+            users=20, groups=3, posts=60, follows=40, comments=100, seed=1
+        )
+
+    def test_generated_data(self):
+        """Генератор создаёт заданный объём данных и ленты подписок."""
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(FeedItem.objects.exists())
+
+    def test_authors_follow_power_law(self):
+        """У самого активного автора заметно больше постов,
+        чем в среднем."""
+        top = Post.objects.filter(author__username='bench-user-0').count()
+        self.assertGreater(top, Post.objects.count() / 20 * 3)
+
+    def test_scenarios_measured(self):
+        """Для каждой страницы снимаются задержки и число запросов."""
+        results = run_scenarios(requests=2, warmup=0)
+        self.assertEqual(
+            set(results),
+            {
+                'index', 'index_deep', 'group_posts', 'profile',
+                'follow_index', 'post_detail',
+            },
+        )
+        for name, stats in results.items():
+            with self.subTest(name=name):
+                self.assertGreater(stats['queries'], 0)
+                self.assertLessEqual(stats['p50'], stats['p99'])
+
+    def test_compare_finds_regressions(self):
+        """Рост числа запросов и задержек считается регрессией."""
+        baseline = {'index': {'p50': 10, 'p95': 20, 'p99': 30, 'queries': 2}}
+        same = {'index': {'p50': 11, 'p95': 21, 'p99': 90, 'queries': 2}}
+        self.assertEqual(compare(same, baseline, tolerance=0.25), [])
+        worse = {'index': {'p50': 20, 'p95': 21, 'p99': 30, 'queries': 3}}
+        self.assertEqual(len(compare(worse, baseline, tolerance=0.25)), 2)
+
+    def test_percentile_interpolated(self):
+        """Перцентиль интерполируется между соседними значениями
+        и считается по одному замеру."""
+        latencies = [4, 1, 3, 2]
+        self.assertEqual(percentile(latencies, 50), 2.5)
+        self.assertEqual(percentile(latencies, 0), 1)
+        self.assertEqual(percentile(latencies, 100), 4)
+        self.assertAlmostEqual(percentile(latencies, 95), 3.85)
+        self.assertEqual(percentile([7], 99), 7)
@@ -0,0 +1,171 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cache import get_versions, version_key
+from ..models import Follow, Group, Post
+from .utils import OnCommitMixin
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    GROUP_DESCRIPTION,
+    GROUP_SLUG,
+    GROUP_TITLE,
+    GROUP_LIST_URL_NAME,
+    INDEX_URL_NAME,
+    NO_AUTHOR_USERNAME,
+    POST_TEXT,
+    POST_TEXT_2,
+    PROFILE_UNFOLLOW_URL_NAME,
+    PROFILE_URL_NAME,
+)
+
+User = get_user_model()
+
+# Сессия и пользователь запроса.
+SESSION_QUERIES = 2
+
+
+class PostCardCacheTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text=POST_TEXT,
+            group=cls.group,
+        )
+        cls.url = reverse(GROUP_LIST_URL_NAME, kwargs={'slug': GROUP_SLUG})
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_card_is_cached(self):
+        """Карточка поста берётся из кэша, пока пост не изменился."""
+        self.guest_client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text=POST_TEXT_2)
+        response = self.guest_client.get(self.url)
+        self.assertNotContains(response, POST_TEXT_2)
+
+    def test_card_invalidated_on_post_save(self):
+        """Изменение поста сбрасывает его карточку."""
+        self.guest_client.get(self.url)
+        self.post.text = POST_TEXT_2
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, POST_TEXT_2)
+
+    def test_card_invalidated_on_author_rename(self):
+        """Смена имени автора сбрасывает карточки его постов."""
+        self.guest_client.get(self.url)
+        self.user.first_name = 'Лев'
+        self.user.last_name = 'Толстой'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Лев Толстой')
+
+
+class ListingCacheTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.post = Post.objects.create(author=cls.user, text=POST_TEXT)
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def test_stale_page_served_while_locked(self):
+        """Пока страницу перестраивает другой запрос, отдаётся старая."""
+        url = reverse(INDEX_URL_NAME)
+        self.guest_client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=self.user, text=POST_TEXT_2)
+        with mock.patch.object(cache, 'add', return_value=False) as add:
+            response = self.guest_client.get(url)
+        add.assert_called_once()
+        self.assertNotContains(response, POST_TEXT_2)
+        response = self.guest_client.get(url)
+        self.assertContains(response, POST_TEXT_2)
+
+    def test_versions_bumped_after_commit(self):
+        """Версии повышаются только после фиксации транзакции,
+        откат их не меняет."""
+        key = version_key('index')
+        before = get_versions(key)
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                Post.objects.create(author=self.user, text=POST_TEXT_2)
+                self.assertEqual(get_versions(key), before)
+        self.assertEqual(get_versions(key), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_versions(key), before)
+        before = get_versions(key)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    Post.objects.create(author=self.user, text=POST_TEXT_2)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(get_versions(key), before)
+
+
+class SharedListingCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.reader = User.objects.create_user(username=NO_AUTHOR_USERNAME)
+        cls.post = Post.objects.create(author=cls.user, text=POST_TEXT)
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_body_shared_between_users(self):
+        """Тело ленты, закэшированное для гостя, получают
+        и вошедшие пользователи, каждый со своей шапкой."""
+        url = reverse(INDEX_URL_NAME)
+        self.guest_client.get(url)
+        Post.objects.filter(pk=self.post.pk).update(text=POST_TEXT_2)
+        for client, username in (
+            (self.author_client, AUTHOR_USERNAME),
+            (self.reader_client, NO_AUTHOR_USERNAME),
+        ):
+            with self.subTest(username=username):
+                response = client.get(url)
+                self.assertNotContains(response, POST_TEXT_2)
+                self.assertContains(response, f'Пользователь: {username}')
+                self.assertEqual(response.metrics.queries, SESSION_QUERIES)
+
+    def test_follow_button_per_user(self):
+        """Кнопка подписки отрисовывается для каждого пользователя."""
+        url = reverse(PROFILE_URL_NAME, kwargs={'username': AUTHOR_USERNAME})
+        unfollow_url = reverse(
+            PROFILE_UNFOLLOW_URL_NAME, kwargs={'username': AUTHOR_USERNAME}
+        )
+        self.guest_client.get(url)
+        self.assertContains(self.reader_client.get(url), unfollow_url)
+        self.assertNotContains(self.author_client.get(url), unfollow_url)
@@ -0,0 +1,101 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+from ..views import NUMBER_OF_COMMENTS
+from .utils import OnCommitMixin
+
+from posts.tests.constants import (
+    ADD_COMMENT_POST_URL_NAME,
+    AUTHOR_USERNAME,
+    GROUP_DESCRIPTION,
+    GROUP_SLUG,
+    GROUP_TITLE,
+    POST_DETAIL_URL_NAME,
+    POST_TEXT,
+)
+
+User = get_user_model()
+
+EXTRA_COMMENTS = 5
+
+
+class PostCommentsTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text=POST_TEXT,
+            group=cls.group,
+        )
+        cls.url = reverse(
+            POST_DETAIL_URL_NAME, kwargs={'post_id': cls.post.pk}
+        )
+        for number in range(NUMBER_OF_COMMENTS + EXTRA_COMMENTS):
+            Comment.objects.create(
+                post=cls.post,
+                author=User.objects.create_user(username=f'reader-{number}'),
+                text=f'Комментарий {number}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_comments_paginated(self):
+        """Комментарии выводятся окнами с переходом по курсору."""
+        response = self.authorized_client.get(self.url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), NUMBER_OF_COMMENTS)
+        self.assertTrue(comments.has_next())
+        response = self.authorized_client.get(
+            self.url, {'comments': comments.next_cursor}
+        )
+        older = response.context['comments']
+        self.assertEqual(len(older), EXTRA_COMMENTS)
+        self.assertFalse(older.has_next())
+        self.assertEqual(older[-1].text, 'Комментарий 0')
+
+    def test_comment_authors_joined(self):
+        """Авторы комментариев загружаются одним запросом с окном."""
+        post = Post.objects.create(
+            author=self.user,
+            text=POST_TEXT,
+            group=self.group,
+        )
+        Comment.objects.create(post=post, author=self.user, text=POST_TEXT)
+        response = self.authorized_client.get(
+            reverse(POST_DETAIL_URL_NAME, kwargs={'post_id': post.pk})
+        )
+        single_comment_queries = response.metrics.queries
+        response = self.authorized_client.get(self.url)
+        self.assertEqual(response.metrics.queries, single_comment_queries)
+
+    def test_first_page_cached(self):
+        """Первая страница комментариев берётся из кэша
+        до нового комментария."""
+        self.authorized_client.get(self.url)
+        Comment.objects.filter(post=self.post).update(text='Изменён')
+        response = self.authorized_client.get(self.url)
+        self.assertNotContains(response, 'Изменён')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.authorized_client.post(
+                reverse(
+                    ADD_COMMENT_POST_URL_NAME,
+                    kwargs={'post_id': self.post.pk},
+                ),
+                data={'text': 'Новый комментарий'},
+            )
+        response = self.authorized_client.get(self.url)
+        self.assertContains(response, 'Новый комментарий')
+        self.assertContains(response, 'Изменён')
@@ -0,0 +1,146 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import OnCommitMixin
+
+from posts.tests.constants import (
+    ADD_COMMENT_POST_URL_NAME,
+    AUTHOR_USERNAME,
+    GROUP_DESCRIPTION,
+    GROUP_LIST_URL_NAME,
+    GROUP_SLUG,
+    GROUP_TITLE,
+    NO_AUTHOR_USERNAME,
+    POST_DETAIL_URL_NAME,
+    POST_TEXT,
+    PROFILE_URL_NAME,
+)
+
+User = get_user_model()
+
+PASSWORD = 'Pa55-word'
+
+
+class ConditionalGetTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.reader = User.objects.create_user(username=NO_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text=POST_TEXT,
+            group=cls.group,
+        )
+        cls.urls = (
+            reverse(GROUP_LIST_URL_NAME, kwargs={'slug': GROUP_SLUG}),
+            reverse(PROFILE_URL_NAME, kwargs={'username': AUTHOR_USERNAME}),
+            reverse(POST_DETAIL_URL_NAME, kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def assertNotModified(self, client, url):
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.templates, [])
+        return etag
+
+    def test_unchanged_page_not_modified(self):
+        """Неизменившаяся страница отдаётся ответом 304
+        без отрисовки шаблонов."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertNotModified(self.guest_client, url)
+                self.assertNotModified(self.reader_client, url)
+
+    def test_validators_private(self):
+        """Страница зависит от пользователя: ETag у гостя и читателя
+        разный, Last-Modified не отдаётся, общие кэши её не хранят."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                guest = self.guest_client.get(url)
+                reader = self.reader_client.get(url)
+                self.assertNotEqual(guest['ETag'], reader['ETag'])
+                self.assertFalse(reader.has_header('Last-Modified'))
+                self.assertIn('private', reader['Cache-Control'])
+
+    def test_changes_invalidate_etag(self):
+        """ETag группы меняется с новым постом, профиля - с подпиской,
+        поста - с комментарием."""
+        group_url, profile_url, post_url = self.urls
+        changes = (
+            (group_url, lambda: Post.objects.create(
+                author=self.reader, text=POST_TEXT, group=self.group
+            )),
+            (profile_url, lambda: Follow.objects.create(
+                user=self.reader, author=self.user
+            )),
+            (post_url, lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text=POST_TEXT
+            )),
+        )
+        for url, change in changes:
+            with self.subTest(url=url):
+                etag = self.assertNotModified(self.reader_client, url)
+                with self.captureOnCommitCallbacks(execute=True):
+                    change()
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_relogin_changes_etag(self):
+        """После выхода и повторного входа того же пользователя форма
+        комментария отрисовывается заново с новым CSRF-токеном."""
+        reader = User.objects.get(pk=self.reader.pk)
+        reader.set_password(PASSWORD)
+        reader.save()
+        client = Client(enforce_csrf_checks=True)
+
+        def log_in():
+            client.get(reverse('users:login'))
+            client.post(reverse('users:login'), {
+                'username': reader.username,
+                'password': PASSWORD,
+                'csrfmiddlewaretoken': client.cookies['csrftoken'].value,
+            })
+
+        post_url = self.urls[2]
+        log_in()
+        etag = client.get(post_url)['ETag']
+        client.get(reverse('users:logout'))
+        log_in()
+        response = client.get(post_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        response = client.post(
+            reverse(
+                ADD_COMMENT_POST_URL_NAME, kwargs={'post_id': self.post.pk}
+            ),
+            {
+                'text': POST_TEXT,
+                'csrfmiddlewaretoken': str(response.context['csrf_token']),
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_missing_profile_not_conditional(self):
+        """У несуществующего профиля нет ETag."""
+        response = self.guest_client.get(
+            reverse(PROFILE_URL_NAME, kwargs={'username': 'nobody'})
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('ETag'))
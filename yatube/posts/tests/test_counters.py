@@ -0,0 +1,81 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, UserStats
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    FOLLOW_AUTHOR_USERNAME,
+    POST_TEXT,
+    PROFILE_FOLLOW_URL_NAME,
+    PROFILE_UNFOLLOW_URL_NAME,
+)
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.author = User.objects.create_user(
+            username=FOLLOW_AUTHOR_USERNAME)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get_stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_posts_count(self):
+        """Счётчик постов меняется при создании и удалении поста."""
+        post = Post.objects.create(author=self.author, text=POST_TEXT)
+        self.assertEqual(self.get_stats(self.author).posts_count, 1)
+        post.delete()
+        self.assertEqual(self.get_stats(self.author).posts_count, 0)
+
+    def test_comments_count(self):
+        """Счётчик комментариев поста меняется вместе с комментариями."""
+        post = Post.objects.create(author=self.author, text=POST_TEXT)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text=POST_TEXT
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counts(self):
+        """Подписка и отписка меняют счётчики обоих пользователей."""
+        kwargs = {'username': self.author.username}
+        self.authorized_client.get(
+            reverse(PROFILE_FOLLOW_URL_NAME, kwargs=kwargs))
+        self.assertEqual(self.get_stats(self.user).following_count, 1)
+        self.assertEqual(self.get_stats(self.author).followers_count, 1)
+        self.authorized_client.get(
+            reverse(PROFILE_UNFOLLOW_URL_NAME, kwargs=kwargs))
+        self.assertEqual(self.get_stats(self.user).following_count, 0)
+        self.assertEqual(self.get_stats(self.author).followers_count, 0)
+
+    def test_reconcile_counters_command(self):
+        """Команда reconcile_counters исправляет расхождения."""
+        Post.objects.create(author=self.author, text=POST_TEXT)
+        Follow.objects.create(user=self.user, author=self.author)
+        UserStats.objects.update(
+            posts_count=5, followers_count=5, following_count=5
+        )
+        UserStats.objects.filter(user=self.user).delete()
+        call_command('reconcile_counters', stdout=StringIO())
+        self.assertEqual(
+            list(UserStats.objects.order_by('user').values_list(
+                'posts_count', 'followers_count', 'following_count'
+            )),
+            [(0, 0, 1), (1, 1, 0)]
+        )
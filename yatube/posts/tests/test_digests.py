@@ -0,0 +1,132 @@
+import email
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import digests
+from ..digests import RateLimiter, send_digests
+from ..models import DigestState, FeedItem, Follow, Post
+from .utils import SMTPSink
+
+from posts.tests.constants import (
+    FOLLOW_AUTHOR_USERNAME,
+    POST_TEXT,
+    POST_TEXT_2,
+)
+
+User = get_user_model()
+
+FOLLOWERS_COUNT = 3
+
+
+class DigestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=FOLLOW_AUTHOR_USERNAME)
+        cls.followers = [
+            User.objects.create_user(
+                username=f'follower-{number}',
+                email=f'follower-{number}@example.com',
+            )
+            for number in range(FOLLOWERS_COUNT)
+        ]
+        cls.silent = User.objects.create_user(username='no-email')
+        for user in (*cls.followers, cls.silent):
+            Follow.objects.create(user=user, author=cls.author)
+        Post.objects.create(author=cls.author, text=POST_TEXT)
+        Post.objects.create(author=cls.author, text=POST_TEXT_2)
+
+    def send(self, **kwargs):
+        with SMTPSink() as sink, override_settings(**sink.settings):
+            sent = send_digests(rate=0, **kwargs)
+        return sent, sink
+
+    def test_one_connection_and_template_load(self):
+        """Письма всем подписчикам уходят через одно соединение,
+        шаблоны загружаются один раз."""
+        with mock.patch.object(
+            digests, 'get_template', wraps=digests.get_template
+        ) as get_template:
+            sent, sink = self.send(batch_size=2)
+        self.assertEqual(sent, FOLLOWERS_COUNT)
+        self.assertEqual(sink.connections, 1)
+        self.assertEqual(get_template.call_count, len(digests.TEMPLATES))
+        recipients = set()
+        for raw in sink.messages:
+            message = email.message_from_bytes(raw)
+            recipients.add(message['To'])
+            text = message.get_payload()[0].get_payload(decode=True)
+            self.assertIn(POST_TEXT_2, text.decode())
+        self.assertEqual(
+            recipients, {user.email for user in self.followers}
+        )
+
+    def test_digest_sent_once_per_interval(self):
+        """Повторный запуск в тот же интервал писем не шлёт,
+        а после интервала шлёт только новые посты."""
+        self.send()
+        self.assertEqual(DigestState.objects.count(), FOLLOWERS_COUNT)
+        self.assertEqual(self.send()[0], 0)
+        later = timezone.now() + digests.DIGEST_INTERVAL
+        self.assertEqual(self.send(now=later)[0], 0)
+        later += digests.DIGEST_INTERVAL
+        post = Post.objects.create(author=self.author, text='Свежий пост')
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=later - timedelta(minutes=1)
+        )
+        post.feed_entries.update(pub_date=later - timedelta(minutes=1))
+        sent, sink = self.send(now=later)
+        self.assertEqual(sent, FOLLOWERS_COUNT)
+        message = email.message_from_bytes(sink.messages[0])
+        text = message.get_payload()[0].get_payload(decode=True).decode()
+        self.assertIn('Свежий пост', text)
+        self.assertNotIn(POST_TEXT_2, text)
+
+    def test_state_saved_without_new_posts(self):
+        """Подписчик без новых постов тоже получает границу и до конца
+        интервала не проверяется."""
+        reader = User.objects.create_user(
+            username='reader', email='reader@example.com'
+        )
+        self.assertEqual(self.send()[0], FOLLOWERS_COUNT)
+        self.assertTrue(DigestState.objects.filter(user=reader).exists())
+        with mock.patch.object(
+            digests, '_new_items', wraps=digests._new_items
+        ) as new_items:
+            self.send()
+        new_items.assert_not_called()
+
+    def test_late_feed_items_sent(self):
+        """Запись ленты, добавленная после рассылки к посту с более
+        ранней датой, уходит в следующем дайджесте."""
+        post = Post.objects.create(author=self.author, text='Поздний пост')
+        FeedItem.objects.filter(post=post).delete()
+        self.send()
+        FeedItem.objects.bulk_create(
+            FeedItem(user=user, post=post, pub_date=post.pub_date)
+            for user in self.followers
+        )
+        later = timezone.now() + digests.DIGEST_INTERVAL
+        sent, sink = self.send(now=later)
+        self.assertEqual(sent, FOLLOWERS_COUNT)
+        message = email.message_from_bytes(sink.messages[0])
+        text = message.get_payload()[0].get_payload(decode=True).decode()
+        self.assertIn('Поздний пост', text)
+
+    def test_rate_limiter(self):
+        """Ограничитель выдерживает паузу между событиями."""
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(4, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.wait()
+        self.assertEqual(sleeps, [0.25, 0.25])
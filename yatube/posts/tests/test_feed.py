@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.tasks import run_pending
+
+from ..models import FeedItem, Follow, Post
+from ..search import search_posts
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    FOLLOW_AUTHOR_USERNAME,
+    POST_TEXT,
+)
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.author = User.objects.create_user(
+            username=FOLLOW_AUTHOR_USERNAME)
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text=POST_TEXT,
+        )
+
+    def test_follow_fills_feed(self):
+        """Подписка переносит в ленту уже опубликованные посты автора."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.user, post=self.old_post
+        ).exists())
+
+    def test_new_post_fan_out(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(author=self.author, text=POST_TEXT)
+        feed_item = FeedItem.objects.get(user=self.user, post=new_post)
+        self.assertEqual(feed_item.pub_date, new_post.pub_date)
+
+    def test_unfollow_clears_feed(self):
+        """Отписка убирает посты автора из ленты."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.filter(user=self.user, author=self.author).delete()
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
+
+    def test_backfill_feed_command(self):
+        """Команда backfill_feed восстанавливает ленты по подпискам."""
+        Follow.objects.create(user=self.user, author=self.author)
+        FeedItem.objects.all().delete()
+        call_command('backfill_feed', stdout=StringIO())
+        self.assertEqual(
+            list(FeedItem.objects.values_list('user', 'post')),
+            [(self.user.pk, self.old_post.pk)]
+        )
+
+    @override_settings(TASKS_EAGER=False)
+    def test_post_side_effects_deferred(self):
+        """Без TASKS_EAGER лента и поиск обновляются обработчиком
+        очереди, а не в запросе."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Отложенный')
+        feed = FeedItem.objects.filter(user=self.user, post=new_post)
+        self.assertFalse(feed.exists())
+        self.assertEqual(list(search_posts('Отложенный')[:1]), [])
+        run_pending()
+        self.assertTrue(feed.exists())
+        self.assertEqual(list(search_posts('Отложенный')[:1]), [new_post])
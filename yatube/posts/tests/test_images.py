@@ -0,0 +1,119 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..imaging import encode_variants
+from ..models import Post
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    POST_CREATE_POST_URL_NAME,
+    POST_EDIT_URL_NAME,
+    POST_TEXT,
+    PROFILE_URL_NAME,
+)
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    THUMBNAIL_WORKERS=0,
+    IMAGE_VARIANT_PROCESSES=0,
+)
+class PostThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, name='small.gif'):
+        self.authorized_client.post(
+            reverse(POST_CREATE_POST_URL_NAME),
+            data={
+                'text': POST_TEXT,
+                'image': SimpleUploadedFile(
+                    name=name, content=SMALL_GIF, content_type='image/gif'
+                ),
+            },
+        )
+        return Post.objects.latest('pk')
+
+    def test_thumbnails_generated_on_upload(self):
+        """Миниатюры готовятся при загрузке и выводятся на странице."""
+        post = self.create_post()
+        card_url = post.thumbnail_urls.get('card')
+        self.assertIsNotNone(card_url)
+        response = self.authorized_client.get(
+            reverse(PROFILE_URL_NAME, kwargs={'username': self.user.username})
+        )
+        self.assertContains(response, card_url)
+
+    def test_thumbnails_regenerated_on_image_change(self):
+        """Новая картинка при редактировании получает новые миниатюры."""
+        post = self.create_post()
+        old_url = post.thumbnail_urls['card']
+        self.authorized_client.post(
+            reverse(POST_EDIT_URL_NAME, kwargs={'post_id': post.pk}),
+            data={
+                'text': POST_TEXT,
+                'image': SimpleUploadedFile(
+                    name='other.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif',
+                ),
+            },
+        )
+        post.refresh_from_db()
+        self.assertNotEqual(post.thumbnail_urls['card'], old_url)
+
+    def test_variants_generated_on_upload(self):
+        """Варианты картинки сохраняются и выводятся в srcset."""
+        post = self.create_post()
+        mime_type, srcset = post.image_sources[-1]
+        self.assertEqual(mime_type, 'image/jpeg')
+        self.assertIn('_480w.jpg 480w', srcset)
+        response = self.authorized_client.get(
+            reverse(PROFILE_URL_NAME, kwargs={'username': self.user.username})
+        )
+        self.assertContains(response, srcset)
+
+
+class EncodeVariantsTests(TestCase):
+    def test_widths_not_upscaled(self):
+        """Варианты шире исходной картинки не создаются."""
+        buffer = BytesIO()
+        Image.new('RGB', (1000, 500)).save(buffer, 'PNG')
+        variants = encode_variants(
+            buffer.getvalue(), (480, 960, 1440), 2, ['jpeg']
+        )
+        self.assertEqual([width for width, _, _ in variants], [480, 960])
+        with Image.open(BytesIO(variants[0][2])) as image:
+            self.assertEqual(image.size, (480, 240))
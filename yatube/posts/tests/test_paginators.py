@@ -0,0 +1,255 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+from .. import paginators
+from ..cache import version_key
+from ..paginators import (
+    NEXT,
+    PREVIOUS,
+    CountingPaginator,
+    CursorPage,
+    CursorPaginator,
+    encode_cursor,
+    estimate_count,
+)
+from .utils import OnCommitMixin
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    FOLLOW_AUTHOR_USERNAME,
+    GROUP_DESCRIPTION,
+    GROUP_SLUG,
+    GROUP_TITLE,
+    GROUP_LIST_URL_NAME,
+    INDEX_URL_NAME,
+    POST_TEXT,
+    PROFILE_FOLLOW_INDEX_URL_NAME,
+    PROFILE_URL_NAME,
+)
+
+User = get_user_model()
+
+TEST_COUNT_POST = 13
+MANY_PAGES = 100
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'{POST_TEXT}-{i}')
+            for i in range(TEST_COUNT_POST)
+        )
+        cls.expected = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def test_pages_follow_cursors(self):
+        """Курсоры обходят все записи без пропусков и повторов."""
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        seen = []
+        page = paginator.get_page()
+        self.assertFalse(page.has_previous())
+        while True:
+            seen.extend(page)
+            if not page.has_next():
+                break
+            page = paginator.get_page(page.next_cursor)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Курсор назад возвращает предыдущую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        first_page = paginator.get_page()
+        second_page = paginator.get_page(first_page.next_cursor)
+        back_page = paginator.get_page(second_page.previous_cursor)
+        self.assertEqual(list(back_page), list(first_page))
+        self.assertFalse(back_page.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Ошибочный курсор приводит к первой странице."""
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        page = paginator.get_page('not-a-cursor')
+        self.assertEqual(list(page), self.expected[:5])
+
+    def test_malformed_cursor_values_return_first_page(self):
+        """Курсор с ключами не того типа приводит к первой странице."""
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        cursors = [
+            encode_cursor(NEXT, ['garbage', 'x']),
+            encode_cursor(NEXT, ['2020-01-01T00:00:00+00:00', 'x']),
+            encode_cursor(PREVIOUS, ['2020-13-45T00:00:00', 1]),
+            encode_cursor(NEXT, [None, True]),
+            encode_cursor(NEXT, ['2020-01-01T00:00:00+00:00', 2 ** 64]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual(list(page), self.expected[:5])
+
+    def test_cursor_past_the_end_gives_empty_page(self):
+        """Курсор за концом списка даёт пустую страницу без курсоров."""
+        paginator = CursorPaginator(Post.objects.all(), 5)
+        oldest, newest = self.expected[-1], self.expected[0]
+        pages = [
+            paginator.get_page(paginator.cursor_for(oldest, NEXT)),
+            paginator.get_page(paginator.cursor_for(newest, PREVIOUS)),
+        ]
+        for page in pages:
+            with self.subTest(page=page):
+                self.assertEqual(len(page), 0)
+                self.assertIsNone(page.next_cursor)
+                self.assertIsNone(page.previous_cursor)
+
+
+@override_settings(POSTS_CURSOR_PAGINATION=True)
+class CursorPaginationViewsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.author = User.objects.create_user(
+            username=FOLLOW_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        for i in range(TEST_COUNT_POST):
+            Post.objects.create(
+                author=cls.author,
+                text=f'{POST_TEXT}-{i}',
+                group=cls.group,
+            )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_listing_pages_use_cursor(self):
+        """Страницы списков переключаются курсором."""
+        pages_names = {
+            INDEX_URL_NAME: {},
+            GROUP_LIST_URL_NAME: {'slug': self.group.slug},
+            PROFILE_URL_NAME: {'username': self.author.username},
+            PROFILE_FOLLOW_INDEX_URL_NAME: {},
+        }
+        for url_name, kwargs in pages_names.items():
+            with self.subTest(url_name=url_name):
+                url = reverse(url_name, kwargs=kwargs)
+                response = self.authorized_client.get(url)
+                page_obj = response.context['page_obj']
+                self.assertIsInstance(page_obj, CursorPage)
+                self.assertEqual(len(page_obj), 10)
+                self.assertContains(response, page_obj.next_cursor)
+                cache.clear()
+                response = self.authorized_client.get(
+                    url, {'cursor': page_obj.next_cursor}
+                )
+                self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_bad_cursor_does_not_break_page(self):
+        """Испорченный курсор и курсор за концом списка не ломают
+        страницу."""
+        first_post = Post.objects.order_by('-pub_date', '-pk')[0]
+        cursors = [
+            encode_cursor(NEXT, ['garbage', 'x']),
+            encode_cursor(PREVIOUS, [first_post.pub_date, first_post.pk]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                cache.clear()
+                response = self.authorized_client.get(
+                    reverse(INDEX_URL_NAME), {'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+
+
+class CountingPaginatorTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'{POST_TEXT}-{i}')
+            for i in range(TEST_COUNT_POST)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def paginator(self, object_list=None):
+        return CountingPaginator(
+            Post.objects.all() if object_list is None else object_list,
+            5,
+            count_key='index',
+            version_keys=[version_key('index')],
+        )
+
+    def test_count_cached_until_write(self):
+        """Число постов берётся из кэша до изменения постов."""
+        self.assertEqual(self.paginator().count, TEST_COUNT_POST)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.paginator().count, TEST_COUNT_POST)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(author=self.user, text=POST_TEXT)
+        self.assertEqual(self.paginator().count, TEST_COUNT_POST + 1)
+
+    def test_estimate_above_threshold(self):
+        """Выше порога используется оценка планировщика."""
+        estimate = TEST_COUNT_POST * 10
+        estimator = mock.patch.object(
+            paginators, 'estimate_count', return_value=estimate
+        )
+        threshold = mock.patch.object(
+            paginators, 'COUNT_ESTIMATE_THRESHOLD', 5
+        )
+        with estimator, threshold:
+            paginator = self.paginator()
+            self.assertEqual(paginator.count, estimate)
+            self.assertTrue(paginator.count_is_estimate)
+
+    def test_sqlite_estimate_from_statistics(self):
+        """SQLite оценивает только всю таблицу по статистике ANALYZE."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('Оценка по статистике SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.assertEqual(estimate_count(Post.objects.all()), TEST_COUNT_POST)
+        self.assertIsNone(
+            estimate_count(Post.objects.filter(author=self.user))
+        )
+
+    def test_elided_page_range(self):
+        """Выводится окно вокруг текущей страницы и края списка."""
+        paginator = CountingPaginator(range(MANY_PAGES * 5), 5)
+        ellipsis = CountingPaginator.ELLIPSIS
+        self.assertEqual(
+            list(paginator.get_elided_page_range(50)),
+            [1, ellipsis, 48, 49, 50, 51, 52, ellipsis, MANY_PAGES],
+        )
+        self.assertEqual(
+            list(paginator.get_elided_page_range(1)),
+            [1, 2, 3, ellipsis, MANY_PAGES],
+        )
+        paginator = CountingPaginator(range(20), 5)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(2)), [1, 2, 3, 4]
+        )
+
+    def test_estimated_range_has_no_last_pages(self):
+        """При оценочном числе постов ссылок на последние страницы нет."""
+        paginator = CountingPaginator(range(MANY_PAGES * 5), 5)
+        paginator._counted = (MANY_PAGES * 5, True)
+        self.assertEqual(
+            list(paginator.get_elided_page_range(1)),
+            [1, 2, 3, CountingPaginator.ELLIPSIS],
+        )
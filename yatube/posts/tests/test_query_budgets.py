@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import QueryBudgetMixin
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    GROUP_DESCRIPTION,
+    GROUP_LIST_URL_NAME,
+    GROUP_SLUG,
+    GROUP_TITLE,
+    INDEX_URL_NAME,
+    POST_CREATE_POST_URL_NAME,
+    POST_DETAIL_URL_NAME,
+    POST_TEXT,
+    PROFILE_FOLLOW_INDEX_URL_NAME,
+    PROFILE_URL_NAME,
+)
+
+User = get_user_model()
+
+AUTHORS_COUNT = 5
+POSTS_COUNT = 15
+
+# Сессия и пользователь запроса входят в каждый бюджет, в бюджет
+# профиля - ещё поиск автора для ETag, в бюджеты профиля и ленты
+# подписок - рекомендации авторов, в бюджет главной - популярные группы.
+QUERY_BUDGETS = {
+    INDEX_URL_NAME: 5,
+    GROUP_LIST_URL_NAME: 5,
+    PROFILE_URL_NAME: 8,
+    POST_DETAIL_URL_NAME: 5,
+    PROFILE_FOLLOW_INDEX_URL_NAME: 5,
+    POST_CREATE_POST_URL_NAME: 5,
+}
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        authors = [
+            User.objects.create_user(username=f'author-{number}')
+            for number in range(AUTHORS_COUNT)
+        ]
+        for number in range(POSTS_COUNT):
+            post = Post.objects.create(
+                author=authors[number % AUTHORS_COUNT],
+                group=cls.group,
+                text=POST_TEXT,
+            )
+            Comment.objects.create(post=post, author=cls.user, text=POST_TEXT)
+        for author in authors:
+            Follow.objects.create(user=cls.user, author=author)
+        cls.author = authors[0]
+        cls.post = post
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_pages_within_query_budget(self):
+        """Страницы укладываются в бюджет SQL-запросов."""
+        urls = {
+            INDEX_URL_NAME: reverse(INDEX_URL_NAME),
+            GROUP_LIST_URL_NAME: reverse(
+                GROUP_LIST_URL_NAME, kwargs={'slug': self.group.slug}
+            ),
+            PROFILE_URL_NAME: reverse(
+                PROFILE_URL_NAME, kwargs={'username': self.author.username}
+            ),
+            POST_DETAIL_URL_NAME: reverse(
+                POST_DETAIL_URL_NAME, kwargs={'post_id': self.post.pk}
+            ),
+            PROFILE_FOLLOW_INDEX_URL_NAME: reverse(
+                PROFILE_FOLLOW_INDEX_URL_NAME
+            ),
+            POST_CREATE_POST_URL_NAME: reverse(POST_CREATE_POST_URL_NAME),
+        }
+        for view_name, url in urls.items():
+            with self.subTest(view_name=view_name):
+                response = self.authorized_client.get(url)
+                self.assertEqual(
+                    response.resolver_match.view_name, view_name
+                )
+                self.assertWithinQueryBudget(
+                    response, QUERY_BUDGETS[view_name]
+                )
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import QueryPlanMixin
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    FOLLOW_AUTHOR_USERNAME,
+    GROUP_DESCRIPTION,
+    GROUP_SLUG,
+    GROUP_TITLE,
+    GROUP_LIST_URL_NAME,
+    INDEX_URL_NAME,
+    POST_DETAIL_URL_NAME,
+    POST_TEXT,
+    PROFILE_FOLLOW_INDEX_URL_NAME,
+    PROFILE_URL_NAME,
+)
+
+User = get_user_model()
+
+TEST_COUNT_POST = 15
+
+
+class ListingQueryPlanTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.author = User.objects.create_user(
+            username=FOLLOW_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for i in range(TEST_COUNT_POST):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                text=f'{POST_TEXT}-{i}',
+                group=cls.group if i % 2 else None,
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=POST_TEXT
+            )
+        cls.urls = (
+            reverse(INDEX_URL_NAME),
+            reverse(GROUP_LIST_URL_NAME, kwargs={'slug': cls.group.slug}),
+            reverse(PROFILE_URL_NAME,
+                    kwargs={'username': cls.author.username}),
+            reverse(PROFILE_FOLLOW_INDEX_URL_NAME),
+            reverse(POST_DETAIL_URL_NAME, kwargs={'post_id': cls.post.pk}),
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_listing_queries_use_indexes(self):
+        """Запросы страниц списков идут по индексам без сортировки."""
+        for url in self.urls:
+            self.assertQueriesUseIndexes(self.authorized_client, url)
+            self.assertQueriesUseIndexes(
+                self.authorized_client, f'{url}?page=2'
+            )
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_cursor_queries_use_indexes(self):
+        """Курсорные страницы тоже идут по индексам без сортировки."""
+        for url in self.urls:
+            response = self.authorized_client.get(url)
+            page_obj = response.context.get('page_obj')
+            cache.clear()
+            self.assertQueriesUseIndexes(self.authorized_client, url)
+            if page_obj is not None and page_obj.has_next():
+                self.assertQueriesUseIndexes(
+                    self.authorized_client,
+                    f'{url}?cursor={page_obj.next_cursor}'
+                )
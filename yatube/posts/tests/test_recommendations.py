@@ -0,0 +1,136 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import run_pending
+
+from .. import recommendations
+from ..models import Follow, Suggestion
+from ..recommendations import get_suggestions, rebuild_suggestions
+from ..services import change_following
+from .utils import OnCommitMixin
+
+from posts.tests.constants import (
+    PROFILE_FOLLOW_INDEX_URL_NAME,
+    PROFILE_URL_NAME,
+)
+
+User = get_user_model()
+
+
+class RecommendationTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        (
+            cls.user, cls.author, cls.reader, cls.friend, cls.liked,
+        ) = [
+            User.objects.create_user(username=name)
+            for name in ('user', 'author', 'reader', 'friend', 'liked')
+        ]
+        # author читает friend, reader читает тех же авторов, что и user,
+        # и ещё liked; на friend ведут оба пути.
+        Follow.objects.create(user=cls.author, author=cls.friend)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.reader, author=cls.liked)
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.user, author=cls.author)
+        rebuild_suggestions()
+
+    def setUp(self):
+        cache.clear()
+
+    def suggested(self, user):
+        return [
+            suggestion.author for suggestion in get_suggestions(user)
+        ]
+
+    def test_friends_of_friends_and_co_follows(self):
+        """Рекомендуются авторы друзей и авторы читателей тех же
+        авторов, без себя и уже прочитанных, по убыванию веса."""
+        self.assertEqual(
+            self.suggested(self.user), [self.friend, self.liked]
+        )
+        friend, liked = get_suggestions(self.user)
+        self.assertEqual(liked.score, 1 / 2)
+        self.assertEqual(friend.score, 1 + 1 / 2)
+
+    def test_refreshed_on_follow(self):
+        """Подписка сразу убирает автора из рекомендаций, а пересчёт
+        откладывается и выполняется один раз на серию подписок."""
+        Task.objects.all().delete()
+        Follow.objects.create(user=self.user, author=self.friend)
+        self.assertEqual(self.suggested(self.user), [self.liked])
+        change_following(self.user, follow=[self.liked.pk])
+        self.assertEqual(self.suggested(self.user), [])
+        self.assertEqual(
+            Suggestion.objects.filter(user=self.user).count(), 2
+        )
+        refresh = Task.objects.get()
+        self.assertGreater(refresh.run_after, timezone.now())
+        Task.objects.update(run_after=timezone.now())
+        self.assertEqual(run_pending(), 1)
+        self.assertFalse(Suggestion.objects.filter(user=self.user).exists())
+
+    def test_paths_capped_per_user(self):
+        """Из подписок промежуточного пользователя берутся только
+        последние ``PATHS_PER_USER``."""
+        with mock.patch.object(recommendations, 'PATHS_PER_USER', 1):
+            rebuild_suggestions()
+        # Последний подписчик author - сам user, поэтому совместных
+        # подписок нет, а последняя подписка author - friend.
+        self.assertEqual(self.suggested(self.user), [self.friend])
+
+    def test_rebuild_command(self):
+        """Команда пересчитывает рекомендации всех пользователей."""
+        Suggestion.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_suggestions', '--batch-size', '2', stdout=out)
+        self.assertEqual(
+            self.suggested(self.user), [self.friend, self.liked]
+        )
+        self.assertIn(
+            f'Записано рекомендаций: {Suggestion.objects.count()}',
+            out.getvalue(),
+        )
+
+    def test_pages_show_suggestions(self):
+        """Профиль и лента подписок показывают рекомендации."""
+        client = Client()
+        client.force_login(self.user)
+        for url in (
+            reverse(PROFILE_URL_NAME, kwargs={'username': 'reader'}),
+            reverse(PROFILE_FOLLOW_INDEX_URL_NAME),
+        ):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(
+                    [s.author for s in response.context['suggestions']],
+                    [self.friend, self.liked],
+                )
+                self.assertContains(
+                    response,
+                    reverse(PROFILE_URL_NAME, kwargs={'username': 'liked'}),
+                )
+
+    def test_follow_changes_page_etag(self):
+        """Подписка меняет ETag страницы с рекомендациями до пересчёта."""
+        client = Client()
+        client.force_login(self.user)
+        url = reverse(PROFILE_URL_NAME, kwargs={'username': 'reader'})
+        etag = client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            change_following(self.user, follow=[self.liked.pk])
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [s.author for s in response.context['suggestions']],
+            [self.friend],
+        )
@@ -0,0 +1,169 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+from ..search import search_posts
+from ..views import NUMBER_OF_POSTS
+
+from posts.tests.constants import AUTHOR_USERNAME, POST_TEXT
+
+User = get_user_model()
+
+SEARCH_URL_NAME = 'posts:search'
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.post = Post.objects.create(
+            author=cls.user, text='Прогулка по Ботаническому саду'
+        )
+        cls.commented = Post.objects.create(author=cls.user, text=POST_TEXT)
+        Comment.objects.create(
+            post=cls.commented, author=cls.user, text='Был вчера в саду'
+        )
+
+    def found(self, query):
+        return list(search_posts(query)[:NUMBER_OF_POSTS])
+
+    def test_search_post_text(self):
+        """Посты находятся по словам без учёта регистра и по префиксу."""
+        for query in ('прогулка', 'БОТАНИЧЕСКОМУ сад', 'прогул', 'по'):
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), [self.post])
+
+    def test_search_comments_ranked_lower(self):
+        """Пост находится по комментарию, но ниже совпадения в тексте."""
+        self.assertEqual(self.found('саду'), [self.post, self.commented])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении постов."""
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Поход в горы'
+        post.save()
+        self.assertEqual(self.found('прогулка'), [])
+        self.assertEqual(self.found('горы'), [post])
+        post.delete()
+        self.assertEqual(self.found('горы'), [])
+
+    def test_query_syntax_ignored(self):
+        """Служебные символы запроса не ломают поиск."""
+        for query in ('"сад', 'сад OR NOT', '*', '(:)'):
+            with self.subTest(query=query):
+                self.found(query)
+
+
+@mock.patch('posts.search.SEARCH_CANDIDATES', 3)
+class SearchBeyondCandidatesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.posts = [
+            Post.objects.create(author=cls.user, text=f'Облако {number}')
+            for number in range(7)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.user, text='Белое облако'
+        )
+
+    def test_all_matches_found(self):
+        """Совпадения за окном ранжирования тоже находятся и считаются,
+        страницы не повторяют посты."""
+        results = search_posts('облако')
+        self.assertEqual(results.count(), len(self.posts))
+        found = [
+            post
+            for start in range(0, len(self.posts), 2)
+            for post in results[start:start + 2]
+        ]
+        self.assertEqual(sorted(post.pk for post in found), sorted(
+            post.pk for post in self.posts
+        ))
+        # В окне три новейших поста и пост с новейшим комментарием.
+        self.assertEqual(
+            set(found[:4]), {self.posts[0], *self.posts[4:]}
+        )
+        self.assertEqual(found[4:], self.posts[3:0:-1])
+        self.assertEqual(list(results[5:]), self.posts[2:0:-1])
+
+    def test_many_comments_beyond_window(self):
+        """Несколько совпавших комментариев к старым постам не дают
+        повторов и пропусков за окном."""
+        for post in (self.posts[1], self.posts[1], self.posts[2]):
+            Comment.objects.create(
+                post=post, author=self.user, text='Облако в небе'
+            )
+        results = search_posts('облако')
+        self.assertEqual(results.count(), len(self.posts))
+        found = [
+            post
+            for start in range(0, len(self.posts), 3)
+            for post in results[start:start + 3]
+        ]
+        self.assertCountEqual(found, self.posts)
+
+    def test_count_capped(self):
+        """Выше порога посты не досчитываются, число помечается
+        как нижняя граница."""
+        for threshold, estimate in ((len(self.posts), False), (3, True)):
+            with self.subTest(threshold=threshold):
+                with mock.patch(
+                    'posts.search.COUNT_ESTIMATE_THRESHOLD', threshold
+                ):
+                    results = search_posts('облако')
+                    count = results.count()
+                    self.assertEqual(results.count_is_estimate, estimate)
+                if estimate:
+                    self.assertGreater(count, threshold)
+                    self.assertLess(count, len(self.posts))
+                else:
+                    self.assertEqual(count, len(self.posts))
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        Post.objects.bulk_create(
+            Post(author=cls.user, text=f'Заметка номер {number}')
+            for number in range(NUMBER_OF_POSTS + 1)
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for post in Post.objects.all():
+            post.group = cls.group
+            post.save()
+
+    def test_search_page_paginated(self):
+        """Результаты поиска разбиты на страницы с сохранением запроса."""
+        url = reverse(SEARCH_URL_NAME)
+        response = Client().get(url, {'q': 'заметка'})
+        self.assertEqual(len(response.context['page_obj']), NUMBER_OF_POSTS)
+        self.assertContains(response, '?q=%D0%B7%D0%B0%D0%BC%D0%B5%D1%82')
+        response = Client().get(url, {'q': 'заметка', 'page': 2})
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    @mock.patch('posts.search.COUNT_ESTIMATE_THRESHOLD', 2)
+    def test_large_count_shown_as_lower_bound(self):
+        """Число найденных постов выше порога выводится как нижняя
+        граница."""
+        response = Client().get(reverse(SEARCH_URL_NAME), {'q': 'заметка'})
+        paginator = response.context['page_obj'].paginator
+        self.assertTrue(paginator.count_is_estimate)
+        self.assertContains(response, 'не меньше 3')
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт по индексу."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'номер 3'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
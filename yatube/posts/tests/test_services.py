@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.routers import routing
+
+from ..cache import get_versions, version_key
+from ..models import FeedItem, Follow, Post, UserStats
+from ..services import change_following
+from .utils import OnCommitMixin
+
+from posts.tests.constants import AUTHOR_USERNAME, POST_TEXT
+
+User = get_user_model()
+
+
+class ChangeFollowingTests(OnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.authors = [
+            User.objects.create_user(username=f'author-{number}')
+            for number in range(6)
+        ]
+        for author in cls.authors:
+            Post.objects.create(author=author, text=POST_TEXT)
+        cls.ids = [author.pk for author in cls.authors]
+
+    def stats(self, user_id):
+        return UserStats.objects.get(pk=user_id)
+
+    def test_follow_many(self):
+        """Пакетная подписка создаёт подписки, ленту и счётчики,
+        подписка на себя пропускается."""
+        following = change_following(
+            self.user, follow=[*self.ids[:3], self.user.pk]
+        )
+        self.assertEqual(following, set(self.ids[:3]))
+        self.assertEqual(
+            set(Follow.objects.values_list('author_id', flat=True)),
+            set(self.ids[:3]),
+        )
+        self.assertEqual(FeedItem.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(self.stats(self.user.pk).following_count, 3)
+        self.assertEqual(self.stats(self.ids[0]).followers_count, 1)
+
+    def test_unfollow_many(self):
+        """Пакетная отписка убирает подписки, ленту и счётчики."""
+        change_following(self.user, follow=self.ids)
+        following = change_following(
+            self.user, follow=self.ids[:2], unfollow=self.ids[2:]
+        )
+        self.assertEqual(following, set(self.ids[:2]))
+        self.assertEqual(FeedItem.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(self.stats(self.user.pk).following_count, 2)
+        self.assertEqual(self.stats(self.ids[-1]).followers_count, 0)
+
+    def test_counts_without_stats_rows(self):
+        """Счётчики пользователей без строки счётчиков создаются
+        с верными значениями."""
+        UserStats.objects.filter(
+            pk__in=[self.user.pk, self.ids[0]]
+        ).delete()
+        change_following(self.user, follow=self.ids[:2])
+        self.assertEqual(self.stats(self.user.pk).following_count, 2)
+        self.assertEqual(self.stats(self.ids[0]).followers_count, 1)
+
+    def test_versions_bumped_after_commit(self):
+        """Версии лент и подписок повышаются только после фиксации."""
+        key = version_key('feed', self.user.pk)
+        before = get_versions(key)
+        with self.captureOnCommitCallbacks() as callbacks:
+            change_following(self.user, follow=self.ids[:2])
+            self.assertEqual(get_versions(key), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_versions(key), before)
+
+    def test_queries_independent_of_batch_size(self):
+        """Число запросов не зависит от числа авторов в пакете."""
+        queries = []
+        for batch in (self.ids[:1], self.ids[1:]):
+            with CaptureQueriesContext(connection) as captured:
+                change_following(self.user, follow=batch)
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+
+    @override_settings(DATABASE_REPLICAS=['replica_1'])
+    def test_reads_primary_when_replicas_allowed(self):
+        """Текущие подписки читаются из основной базы, даже если
+        запросу разрешены реплики."""
+        change_following(self.user, follow=self.ids[:1])
+        with routing(True):
+            following = change_following(self.user, unfollow=self.ids[:1])
+        self.assertEqual(following, set())
+        self.assertFalse(Follow.objects.exists())
+
+    def test_same_author_in_both_lists(self):
+        """Автор не может быть одновременно в подписках и отписках."""
+        with self.assertRaises(ValueError):
+            change_following(
+                self.user, follow=self.ids[:1], unfollow=self.ids[:1]
+            )
@@ -0,0 +1,187 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Comment, FeedItem, Follow, Group, Post, UserStats
+from ..search import search_posts
+from ..transfer import Importer
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    FOLLOW_AUTHOR_USERNAME,
+    GROUP_DESCRIPTION,
+    GROUP_SLUG,
+    GROUP_TITLE,
+)
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+PUB_DATE = datetime(2020, 5, 17, 12, 30, tzinfo=timezone.utc)
+
+
+class TransferTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        reader = User.objects.create_user(username=AUTHOR_USERNAME)
+        author = User.objects.create_user(username=FOLLOW_AUTHOR_USERNAME)
+        post = Post.objects.create(
+            author=author, group=group, text='Экспортный пост'
+        )
+        Post.objects.filter(pk=post.pk).update(pub_date=PUB_DATE)
+        Comment.objects.create(post=post, author=reader, text='Комментарий')
+        Follow.objects.create(user=reader, author=author)
+        self.paths = {
+            'groups': os.path.join(TEMP_DIR, 'groups.csv'),
+            'posts': os.path.join(TEMP_DIR, 'posts.jsonl'),
+            'comments': os.path.join(TEMP_DIR, 'comments.csv'),
+            'follows': os.path.join(TEMP_DIR, 'follows.jsonl'),
+        }
+
+    def targets(self):
+        return [f'{kind}={path}' for kind, path in self.paths.items()]
+
+    def test_round_trip(self):
+        """Выгруженные данные загружаются обратно со всеми
+        производными данными."""
+        call_command('export_data', *self.targets(), stdout=StringIO())
+        post_id = Post.objects.get().pk
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        call_command(
+            'import_data', *self.targets(), '--workers', '0',
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        post = Post.objects.select_related(
+            'author__stats', 'group'
+        ).get()
+        self.assertEqual(post.pk, post_id)
+        self.assertEqual(post.pub_date, PUB_DATE)
+        self.assertEqual(post.group.slug, GROUP_SLUG)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.author.stats.posts_count, 1)
+        self.assertEqual(post.author.stats.followers_count, 1)
+        reader = User.objects.get(username=AUTHOR_USERNAME)
+        self.assertTrue(
+            FeedItem.objects.filter(user=reader, post=post).exists()
+        )
+        self.assertEqual(list(search_posts('комментарий')[:1]), [post])
+
+    def test_import_is_idempotent(self):
+        """Повторная загрузка не создаёт дубликатов."""
+        call_command('export_data', *self.targets(), stdout=StringIO())
+        call_command(
+            'import_data', *self.targets(), '--workers', '0',
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_new_rows_after_imported_ids(self):
+        """После загрузки с id из файла новые посты получают
+        следующие id."""
+        importer = Importer(workers=0)
+        reset = mock.patch.object(
+            connection.ops,
+            'sequence_reset_sql',
+            wraps=connection.ops.sequence_reset_sql,
+        )
+        with reset as sequence_reset_sql:
+            importer.run('posts', [{
+                'id': 1000, 'author': AUTHOR_USERNAME, 'text': 'Загруженный',
+            }])
+        self.assertEqual(sequence_reset_sql.call_args[0][1], [Post])
+        importer.run('posts', [{'author': AUTHOR_USERNAME, 'text': 'Без id'}])
+        post = Post.objects.create(
+            author=User.objects.get(username=AUTHOR_USERNAME), text='Новый'
+        )
+        self.assertGreater(Post.objects.get(text='Без id').pk, 1000)
+        self.assertGreater(post.pk, 1000)
+
+    def test_skipped_rows_reported(self):
+        """Строки с занятыми id и повторные подписки не считаются
+        загруженными."""
+        post = Post.objects.get()
+        importer = Importer(workers=0)
+        loaded = importer.run('posts', [
+            {'id': post.pk, 'author': AUTHOR_USERNAME, 'text': 'Повтор'},
+            {'author': AUTHOR_USERNAME, 'text': 'Новый'},
+        ])
+        self.assertEqual(loaded, 1)
+        loaded = importer.run('follows', [
+            {'user': AUTHOR_USERNAME, 'author': FOLLOW_AUTHOR_USERNAME},
+            {'user': FOLLOW_AUTHOR_USERNAME, 'author': AUTHOR_USERNAME},
+        ])
+        self.assertEqual(loaded, 1)
+        self.assertEqual(importer.skipped, 2)
+        self.assertEqual(Post.objects.get(pk=post.pk).text, 'Экспортный пост')
+
+    def test_derived_data_only_for_imported_rows(self):
+        """Ленты, счётчики и индекс обновляются только для загруженных
+        строк, даты из файла сохраняются."""
+        reader = User.objects.get(username=AUTHOR_USERNAME)
+        UserStats.objects.filter(pk=reader.pk).update(posts_count=99)
+        importer = Importer(workers=0)
+        importer.run('posts', [{
+            'author': FOLLOW_AUTHOR_USERNAME,
+            'text': 'Загруженный пост',
+            'pub_date': PUB_DATE.isoformat(),
+        }])
+        importer.run('comments', [{
+            'post': Post.objects.get(text='Загруженный пост').pk,
+            'author': AUTHOR_USERNAME,
+            'text': 'Загруженный комментарий',
+            'created': PUB_DATE.isoformat(),
+        }])
+        importer.finish()
+        post = Post.objects.select_related('author__stats').get(
+            text='Загруженный пост'
+        )
+        self.assertEqual(post.pub_date, PUB_DATE)
+        self.assertEqual(post.comments.get().created, PUB_DATE)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.author.stats.posts_count, 2)
+        self.assertTrue(
+            FeedItem.objects.filter(user=reader, post=post).exists()
+        )
+        self.assertEqual(list(search_posts('загруженный')[:1]), [post])
+        self.assertEqual(UserStats.objects.get(pk=reader.pk).posts_count, 99)
+
+    def test_queries_per_batch_not_per_row(self):
+        """Число запросов пачки не зависит от числа строк."""
+        def rows(count):
+            return [
+                {
+                    'author': f'author-{count}-{number}',
+                    'group': f'group-{count}-{number}',
+                    'text': 'Пост',
+                }
+                for number in range(count)
+            ]
+        queries = []
+        for count in (5, 50):
+            with CaptureQueriesContext(connection) as context:
+                Importer(workers=0).run('posts', rows(count))
+            queries.append(len(context.captured_queries))
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(Post.objects.count(), 56)
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post, TrendingGroup, TrendingPost
+from ..trending import FOLLOW_WEIGHT, refresh_trending
+
+from posts.tests.constants import (
+    AUTHOR_USERNAME,
+    GROUP_DESCRIPTION,
+    GROUP_SLUG,
+    GROUP_TITLE,
+    INDEX_URL_NAME,
+    NO_AUTHOR_USERNAME,
+    POST_TEXT,
+    POST_TEXT_2,
+    TRENDING_URL_NAME,
+)
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=AUTHOR_USERNAME)
+        cls.reader = User.objects.create_user(username=NO_AUTHOR_USERNAME)
+        cls.group = Group.objects.create(
+            title=GROUP_TITLE,
+            slug=GROUP_SLUG,
+            description=GROUP_DESCRIPTION,
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text=POST_TEXT, group=cls.group
+        )
+        cls.other = Post.objects.create(author=cls.author, text=POST_TEXT_2)
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def comment(self, post, age=timedelta()):
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text=POST_TEXT
+        )
+        Comment.objects.filter(pk=comment.pk).update(created=self.now - age)
+
+    def score(self, model, pk):
+        return model.objects.get(pk=pk).score
+
+    def test_comments_decay_with_age(self):
+        """Комментарий старше на период полураспада весит вдвое меньше,
+        группа получает вклад своих постов."""
+        self.comment(self.post)
+        self.comment(self.other, age=timedelta(hours=24))
+        refresh_trending(self.now)
+        self.assertAlmostEqual(self.score(TrendingPost, self.post.pk), 1)
+        self.assertAlmostEqual(self.score(TrendingPost, self.other.pk), 0.5)
+        self.assertAlmostEqual(self.score(TrendingGroup, self.group.pk), 1)
+
+    def test_refresh_adds_only_new_activity(self):
+        """Повторный пересчёт затухает старые оценки и учитывает только
+        новую активность."""
+        self.comment(self.post)
+        refresh_trending(self.now)
+        self.now += timedelta(hours=24)
+        self.comment(self.post)
+        self.assertEqual(refresh_trending(self.now), 1)
+        self.assertAlmostEqual(self.score(TrendingPost, self.post.pk), 1.5)
+
+    def test_follow_boosts_recent_posts(self):
+        """Новый подписчик прибавляет вес недавним постам автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        refresh_trending(self.now)
+        for post in (self.post, self.other):
+            with self.subTest(post=post.pk):
+                self.assertEqual(
+                    self.score(TrendingPost, post.pk), FOLLOW_WEIGHT
+                )
+
+    def test_faded_scores_removed(self):
+        """Затухшие оценки удаляются из списка."""
+        self.comment(self.post)
+        refresh_trending(self.now)
+        refresh_trending(self.now + timedelta(days=30))
+        self.assertFalse(TrendingPost.objects.exists())
+        self.assertFalse(TrendingGroup.objects.exists())
+
+    def test_pages_served_from_list(self):
+        """Страница популярного и боковая панель главной показывают
+        сохранённый список."""
+        self.comment(self.post)
+        self.comment(self.other)
+        self.comment(self.other)
+        out = StringIO()
+        call_command('refresh_trending', stdout=out)
+        self.assertIn('Постов с новой активностью: 2', out.getvalue())
+        client = Client()
+        response = client.get(reverse(TRENDING_URL_NAME))
+        self.assertEqual(
+            list(response.context['posts']), [self.other, self.post]
+        )
+        response = client.get(reverse(INDEX_URL_NAME))
+        self.assertContains(response, GROUP_TITLE)
@@ -14,6 +14,7 @@ from django.core.cache import cache
 from django.db.models.fields.files import ImageFieldFile
 
 from ..models import Group, Post, Comment, Follow
+from .utils import OnCommitMixin
 
 from posts.tests.constants import (
     INDEX_URL_NAME,
@@ -403,7 +404,7 @@ class CommentPostTests(TestCase):
         self.assertIn(comment, response.context['comments'])
 
 
-class CacheIndexTests(TestCase):
+class CacheIndexTests(OnCommitMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -421,31 +422,26 @@ class CacheIndexTests(TestCase):
             author=self.user,
             text='Тестовый пост в кэше',
         )
-        url_patterns = {
-            INDEX_URL_NAME: (
-                {}
-            )
-        }
-        for url_name, params in url_patterns.items():
-            with self.subTest(url_name=url_name):
-                kwargs = params
-        response = self.authorized_client.get(
-            reverse(url_name, kwargs=kwargs)
-        )
-        post_cache.delete()
-        url_patterns = {
-            INDEX_URL_NAME: (
-                {}
-            )
-        }
-        for url_name, params in url_patterns.items():
-            with self.subTest(url_name=url_name):
-                kwargs = params
-        new_response = self.authorized_client.get(
-            reverse(url_name, kwargs=kwargs)
-        )
+        url = reverse(INDEX_URL_NAME)
+        response = self.authorized_client.get(url)
+        Post.objects.filter(pk=post_cache.pk).update(text=POST_TEXT_2)
+        new_response = self.authorized_client.get(url)
         self.assertEqual(response.content, new_response.content)
 
+    def test_cache_invalidated_by_post_delete(self):
+        """Удаление поста сбрасывает кэш главной страницы."""
+        post_cache = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост в кэше',
+        )
+        url = reverse(INDEX_URL_NAME)
+        response = self.authorized_client.get(url)
+        self.assertContains(response, post_cache.text)
+        with self.captureOnCommitCallbacks(execute=True):
+            post_cache.delete()
+        new_response = self.authorized_client.get(url)
+        self.assertNotContains(new_response, post_cache.text)
+
 
 class FollowViewsTests(TestCase):
     @classmethod
@@ -0,0 +1,135 @@
+import re
+import socketserver
+import threading
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test.utils import CaptureQueriesContext
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?(?P<table>\w+)(?!.*\bUSING\b)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE FOR (ORDER|GROUP) BY')
+TABLE_ALIAS = re.compile(r'"(?P<table>\w+)" (?P<alias>\w+)')
+
+
+class QueryPlanMixin:
+    """Проверка планов SQLite для запросов, выполненных страницей."""
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assertQueriesUseIndexes(self, client, url):
+        """Ни один SELECT страницы не читает таблицу целиком
+        и не сортирует результат во временном B-дереве."""
+        tables = set(connection.introspection.table_names())
+        with CaptureQueriesContext(connection) as context:
+            client.get(url)
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT'):
+                continue
+            scanned = tables | {
+                alias.group('alias') for alias in TABLE_ALIAS.finditer(sql)
+                if alias.group('table') in tables
+            }
+            for step in self.explain(sql):
+                with self.subTest(url=url, sql=sql, step=step):
+                    full_scan = FULL_SCAN.search(step)
+                    self.assertFalse(
+                        full_scan and full_scan.group('table') in scanned
+                    )
+                    self.assertIsNone(TEMP_SORT.search(step))
+
+
+class OnCommitMixin:
+    """Выполнение колбэков ``transaction.on_commit`` в ``TestCase``.
+
+    ``TestCase`` не фиксирует транзакцию теста, поэтому колбэки,
+    например повышение версий кэша, сами не выполняются.
+    """
+
+    @contextmanager
+    def captureOnCommitCallbacks(self, using=DEFAULT_DB_ALIAS,
+                                 execute=False):
+        """Собирает колбэки, зарегистрированные внутри блока,
+        и с ``execute`` выполняет их при выходе, как после фиксации."""
+        callbacks = []
+        start = len(connections[using].run_on_commit)
+        try:
+            yield callbacks
+        finally:
+            callbacks[:] = [
+                func for _, func in connections[using].run_on_commit[start:]
+            ]
+            if execute:
+                for callback in callbacks:
+                    callback()
+
+
+class QueryBudgetMixin:
+    """Бюджеты SQL-запросов страниц по данным ``MetricsMiddleware``."""
+
+    def assertWithinQueryBudget(self, response, budget):
+        queries = response.metrics.queries
+        self.assertLessEqual(
+            queries, budget,
+            f'{response.request["PATH_INFO"]}: {queries} запросов '
+            f'при бюджете {budget}',
+        )
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        for line in self.rfile:
+            verb = line[:4].decode().upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 localhost')
+            elif verb == 'DATA':
+                self.reply('354 Конец письма - строка с точкой')
+                lines = []
+                for data in self.rfile:
+                    if data == b'.\r\n':
+                        break
+                    lines.append(data)
+                self.server.messages.append(b''.join(lines))
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    """Локальный SMTP-сервер для тестов: принимает письма
+    и считает соединения."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.connections = 0
+        self.messages = []
+
+    @property
+    def settings(self):
+        return {
+            'EMAIL_BACKEND': 'django.core.mail.backends.smtp.EmailBackend',
+            'EMAIL_HOST': self.server_address[0],
+            'EMAIL_PORT': self.server_address[1],
+        }
+
+    def __enter__(self):
+        threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
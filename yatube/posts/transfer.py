@@ -0,0 +1,370 @@
+"""Потоковые импорт и экспорт групп, постов, комментариев и подписок.
+
+Строки читаются и пишутся по одной, поэтому память не растёт с объёмом
+данных. Импорт сохраняет записи пачками через ``bulk_create`` без
+сигналов моделей. Ленты, счётчики и поисковый индекс обновляются
+в транзакции каждой пачки только для вставленных ею строк, версии
+кэша и миниатюры - один раз в ``finish``.
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Max, Value, When
+from django.utils.dateparse import parse_datetime
+
+from . import search
+from .cache import bump_on_commit, bump_versions, version_key
+from .counters import refresh_comments_counts, refresh_users_stats
+from .feed import add_posts_to_feeds, backfill_feeds
+from .images import generate_pending_images
+from .models import Comment, Follow, Group, Post, User
+
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+IMAGE_WORKERS = 4
+
+# Порядок важен: посты ссылаются на группы, комментарии - на посты.
+KINDS = ('groups', 'posts', 'comments', 'follows')
+FIELDS = {
+    'groups': ('slug', 'title', 'description'),
+    'posts': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comments': ('id', 'post', 'author', 'text', 'created'),
+    'follows': ('user', 'author'),
+}
+EXPORT_VALUES = {
+    'groups': ('slug', 'title', 'description'),
+    'posts': (
+        'id', 'author__username', 'group__slug', 'text', 'pub_date', 'image'
+    ),
+    'comments': ('id', 'post_id', 'author__username', 'text', 'created'),
+    'follows': ('user__username', 'author__username'),
+}
+MODELS = {
+    'groups': Group,
+    'posts': Post,
+    'comments': Comment,
+    'follows': Follow,
+}
+
+
+def parse_targets(targets):
+    """Пары ``вид=файл`` в порядке зависимостей видов."""
+    pairs = {}
+    for target in targets:
+        kind, _, path = target.partition('=')
+        if kind not in KINDS or not path:
+            raise ValueError(
+                f'Ожидается вид=файл, где вид - один из {", ".join(KINDS)}: '
+                f'{target}'
+            )
+        pairs[kind] = path
+    return [(kind, pairs[kind]) for kind in KINDS if kind in pairs]
+
+
+def file_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_rows(stream, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def write_rows(stream, fmt, kind, rows):
+    """Пишет строки и возвращает их количество."""
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, FIELDS[kind])
+        writer.writeheader()
+        write = writer.writerow
+    else:
+        def write(row):
+            stream.write(json.dumps(row, ensure_ascii=False) + '\n')
+    count = 0
+    for row in rows:
+        write(row)
+        count += 1
+    return count
+
+
+def export_rows(kind, chunk_size=EXPORT_CHUNK_SIZE):
+    values = (
+        MODELS[kind].objects.order_by('pk')
+        .values_list(*EXPORT_VALUES[kind])
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in values:
+        yield {
+            field: value.isoformat() if hasattr(value, 'isoformat') else value
+            for field, value in zip(FIELDS[kind], row)
+        }
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_date(value):
+    return parse_datetime(value) if value else None
+
+
+class Importer:
+    """Импорт пачками с кэшем авторов и групп между пачками.
+
+    Строки, которые уже есть в базе или ссылаются на отсутствующие
+    записи, пропускаются и считаются в ``skipped``.
+    ``progress`` вызывается после каждой пачки с видом данных, числом
+    прочитанных строк и временем с начала импорта этого вида.
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, media_root=None,
+                 workers=IMAGE_WORKERS, progress=None):
+        self.batch_size = batch_size
+        self.media_root = media_root
+        self.workers = workers
+        self.progress = progress
+        self.user_ids = {}
+        self.group_ids = {}
+        self.skipped = 0
+
+    def run(self, kind, rows):
+        """Импортирует строки одного вида, возвращает число
+        вставленных."""
+        started = time.monotonic()
+        count = inserted = 0
+        for batch in batches(rows, self.batch_size):
+            with transaction.atomic():
+                added = getattr(self, f'import_{kind}')(batch)
+            inserted += added
+            self.skipped += len(batch) - added
+            count += len(batch)
+            if self.progress:
+                self.progress(kind, count, time.monotonic() - started)
+        return inserted
+
+    def _insert(self, model, objs, date_field):
+        """Вставляет записи, пропуская уже занятые id из файла.
+
+        Возвращает ключи вставленных записей и их число. После записей
+        с id из файла последовательность ключей сдвигается за них, как
+        в loaddata, поэтому ключи остальных записей больше прежнего
+        наибольшего.
+
+        ``auto_now_add`` при вставке заменяет даты ``date_field``
+        текущими, поэтому даты из файла записываются следом одним UPDATE.
+        """
+        dates = [getattr(obj, date_field) for obj in objs]
+        given = [obj for obj in objs if obj.pk is not None]
+        generated = [obj for obj in objs if obj.pk is None]
+        given_ids = {obj.pk for obj in given}
+        new_ids = given_ids - set(
+            model.objects.filter(pk__in=given_ids).values_list('pk', flat=True)
+        )
+        inserted = len(new_ids) + len(generated)
+        last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        if given:
+            model.objects.bulk_create(given, ignore_conflicts=True)
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model]
+                ):
+                    cursor.execute(sql)
+        if generated:
+            model.objects.bulk_create(generated)
+            if generated[0].pk is None:
+                # SQLite не возвращает ключи из bulk_create, а выдаёт
+                # их подряд за наибольшим.
+                keys = model.objects.filter(pk__gt=last).exclude(
+                    pk__in=given_ids
+                ).order_by('pk').values_list('pk', flat=True)
+                for obj, pk in zip(generated, keys):
+                    obj.pk = pk
+            new_ids.update(obj.pk for obj in generated)
+        dated = {
+            obj.pk: date for obj, date in zip(objs, dates)
+            if date is not None and obj.pk in new_ids
+        }
+        if dated:
+            model.objects.filter(pk__in=dated).update(**{
+                date_field: Case(
+                    *(
+                        When(pk=pk, then=Value(date, DateTimeField()))
+                        for pk, date in dated.items()
+                    ),
+                    output_field=DateTimeField(),
+                )
+            })
+        return new_ids, inserted
+
+    def _resolve(self, cache, model, field, values, defaults):
+        """Ключи записей по значениям ``field``, недостающие создаются."""
+        missing = set(values) - cache.keys()
+        if missing:
+            cache.update(
+                model.objects.filter(**{f'{field}__in': missing})
+                .values_list(field, 'pk')
+            )
+            new = missing - cache.keys()
+            if new:
+                model.objects.bulk_create(
+                    model(**{field: value}, **defaults(value))
+                    for value in new
+                )
+                cache.update(
+                    model.objects.filter(**{f'{field}__in': new})
+                    .values_list(field, 'pk')
+                )
+        return cache
+
+    def _users(self, usernames):
+        return self._resolve(
+            self.user_ids, User, 'username', usernames,
+            lambda username: {'password': make_password(None)},
+        )
+
+    def _groups(self, slugs):
+        return self._resolve(
+            self.group_ids, Group, 'slug', slugs,
+            lambda slug: {'title': slug, 'description': ''},
+        )
+
+    def _copy_image(self, name):
+        if not name or self.media_root is None:
+            return name or ''
+        path = os.path.join(self.media_root, name)
+        if not os.path.exists(path):
+            return ''
+        with open(path, 'rb') as source:
+            return default_storage.save(name, File(source))
+
+    def _copy_images(self, names):
+        if self.media_root is None or self.workers < 1:
+            return [self._copy_image(name) for name in names]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(self._copy_image, names))
+
+    def import_groups(self, rows):
+        known = set(
+            Group.objects.filter(
+                slug__in=[row['slug'] for row in rows]
+            ).values_list('slug', flat=True)
+        )
+        groups = Group.objects.bulk_create(
+            Group(
+                slug=row['slug'],
+                title=row['title'],
+                description=row.get('description') or '',
+            )
+            for row in rows
+            if row['slug'] not in known
+        )
+        return len(groups)
+
+    def import_posts(self, rows):
+        users = self._users(row['author'] for row in rows)
+        groups = self._groups(
+            row['group'] for row in rows if row.get('group')
+        )
+        images = self._copy_images([row.get('image') for row in rows])
+        posts = [
+            Post(
+                id=row.get('id') or None,
+                author_id=users[row['author']],
+                group_id=groups[row['group']] if row.get('group') else None,
+                text=row['text'],
+                pub_date=parse_date(row.get('pub_date')),
+                image=image,
+            )
+            for row, image in zip(rows, images)
+        ]
+        new_ids, inserted = self._insert(Post, posts, 'pub_date')
+        if new_ids:
+            add_posts_to_feeds(new_ids)
+            refresh_users_stats({post.author_id for post in posts})
+            search.get_backend().index_posts(new_ids)
+        return inserted
+
+    def import_comments(self, rows):
+        users = self._users(row['author'] for row in rows)
+        posts = set(
+            Post.objects.filter(
+                pk__in={int(row['post']) for row in rows}
+            ).values_list('pk', flat=True)
+        )
+        comments = [
+            Comment(
+                id=row.get('id') or None,
+                post_id=int(row['post']),
+                author_id=users[row['author']],
+                text=row['text'],
+                created=parse_date(row.get('created')),
+            )
+            for row in rows
+            if int(row['post']) in posts
+        ]
+        new_ids, inserted = self._insert(Comment, comments, 'created')
+        if new_ids:
+            post_ids = {comment.post_id for comment in comments}
+            refresh_comments_counts(post_ids)
+            search.get_backend().index_comments(new_ids)
+            bump_on_commit(
+                *(version_key('post', pk) for pk in post_ids),
+                *(version_key('comments', pk) for pk in post_ids),
+            )
+        return inserted
+
+    def import_follows(self, rows):
+        users = self._users(
+            username
+            for row in rows
+            for username in (row['user'], row['author'])
+        )
+        pairs = {
+            (users[row['user']], users[row['author']])
+            for row in rows
+            if row['user'] != row['author']
+        }
+        new = pairs - set(
+            Follow.objects.filter(
+                user_id__in={user_id for user_id, _ in pairs},
+                author_id__in={author_id for _, author_id in pairs},
+            ).values_list('user_id', 'author_id')
+        )
+        last = Follow.objects.aggregate(last=Max('pk'))['last'] or 0
+        Follow.objects.bulk_create(
+            [
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in new
+            ],
+            ignore_conflicts=True,
+        )
+        if new:
+            backfill_feeds(after=last)
+            refresh_users_stats({pk for pair in new for pk in pair})
+        return len(new)
+
+    def finish(self):
+        """Сбрасывает версии кэша лент и готовит миниатюры.
+
+        Ленты, счётчики и индекс уже обновлены пачками. Возвращает
+        число постов, для которых готовились картинки.
+        """
+        bump_versions(version_key('index'), version_key('comments'))
+        return generate_pending_images(self.workers)
@@ -0,0 +1,133 @@
+"""Популярные посты и группы по активности с затуханием во времени.
+
+Событие весит ``weight * 2 ** (-возраст / TRENDING_HALF_LIFE)``.
+Пересчёт сначала умножает все сохранённые оценки на затухание с прошлого
+пересчёта одним UPDATE, затем прибавляет вклад только новой активности:
+комментариев и подписок с id больше границы из ``TrendingState``.
+Оценки ниже ``MIN_SCORE`` удаляются, поэтому в таблицах остаётся только
+недавно активное, и страницы читают готовый список по индексу.
+
+Комментарий прибавляет вес посту и его группе. У подписки нет времени
+создания, поэтому она считается событием момента пересчёта
+и прибавляет вес постам автора за последний ``TRENDING_WINDOW``.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Max, Value, When
+from django.utils import timezone
+
+from .cache import bump_versions, version_key
+from .models import (
+    Comment,
+    Follow,
+    Post,
+    TrendingGroup,
+    TrendingPost,
+    TrendingState,
+)
+
+TRENDING_HALF_LIFE = timedelta(hours=24)
+# Более старая активность не учитывается даже при первом пересчёте.
+TRENDING_WINDOW = timedelta(days=7)
+COMMENT_WEIGHT = 1.0
+FOLLOW_WEIGHT = 2.0
+MIN_SCORE = 0.01
+SCORE_BATCH_SIZE = 500
+TRENDING_POSTS = 20
+TRENDING_GROUPS = 5
+
+
+def _decay(age):
+    return 0.5 ** (age / TRENDING_HALF_LIFE)
+
+
+def _last_pk(queryset, default):
+    return queryset.aggregate(last=Max('pk'))['last'] or default
+
+
+def _new_activity(state, now):
+    """Вклад активности после границы ``state`` по постам.
+
+    Возвращает вклады {id поста: вес}, группы постов {id поста: id
+    группы} и новые границы комментариев и подписок.
+    """
+    since = now - TRENDING_WINDOW
+    scores = Counter()
+    groups = {}
+    comments = Comment.objects.filter(pk__gt=state.last_comment_id)
+    last_comment = _last_pk(comments, state.last_comment_id)
+    for post_id, group_id, created in comments.filter(
+        pk__lte=last_comment, created__gte=since
+    ).values_list('post_id', 'post__group_id', 'created').iterator():
+        scores[post_id] += COMMENT_WEIGHT * _decay(now - created)
+        groups[post_id] = group_id
+    follows = Follow.objects.filter(pk__gt=state.last_follow_id)
+    last_follow = _last_pk(follows, state.last_follow_id)
+    followers = dict(
+        follows.filter(pk__lte=last_follow).order_by().values(
+            'author_id'
+        ).annotate(total=Count('pk')).values_list('author_id', 'total')
+    )
+    if followers:
+        for post_id, group_id, author_id in Post.objects.filter(
+            author_id__in=followers, pub_date__gte=since
+        ).values_list('pk', 'group_id', 'author_id').iterator():
+            scores[post_id] += FOLLOW_WEIGHT * followers[author_id]
+            groups[post_id] = group_id
+    return scores, groups, last_comment, last_follow
+
+
+def _add_scores(model, field, increments):
+    """Прибавляет вклады {id: вес} к оценкам ``model``: недостающие
+    строки создаются, остальные меняются одним UPDATE на пачку."""
+    ids = list(increments)
+    for start in range(0, len(ids), SCORE_BATCH_SIZE):
+        batch = ids[start:start + SCORE_BATCH_SIZE]
+        model.objects.bulk_create(
+            [model(**{f'{field}_id': pk}, score=0) for pk in batch],
+            ignore_conflicts=True,
+        )
+        model.objects.filter(pk__in=batch).update(
+            score=F('score') + Case(
+                *(When(pk=pk, then=Value(increments[pk])) for pk in batch),
+                output_field=FloatField(),
+            )
+        )
+
+
+def refresh_trending(now=None):
+    """Пересчитывает популярность, возвращает число постов с новой
+    активностью."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        state, _ = TrendingState.objects.select_for_update().get_or_create(
+            pk=1
+        )
+        if state.refreshed is not None:
+            decay = _decay(now - state.refreshed)
+            TrendingPost.objects.update(score=F('score') * decay)
+            TrendingGroup.objects.update(score=F('score') * decay)
+        (
+            post_scores, post_groups,
+            state.last_comment_id, state.last_follow_id,
+        ) = _new_activity(state, now)
+        group_scores = Counter()
+        for post_id, score in post_scores.items():
+            if post_groups[post_id] is not None:
+                group_scores[post_groups[post_id]] += score
+        _add_scores(TrendingPost, 'post', post_scores)
+        _add_scores(TrendingGroup, 'group', group_scores)
+        TrendingPost.objects.filter(score__lt=MIN_SCORE).delete()
+        TrendingGroup.objects.filter(score__lt=MIN_SCORE).delete()
+        state.refreshed = now
+        state.save()
+    bump_versions(version_key('trending'))
+    return len(post_scores)
+
+
+def trending_groups(limit=TRENDING_GROUPS):
+    return TrendingGroup.objects.select_related(
+        'group'
+    ).order_by('-score')[:limit]
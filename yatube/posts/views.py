@@ -1,77 +1,174 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
+from django.utils.http import urlencode
+from django.utils.functional import SimpleLazyObject
 
+from .cache import (
+    listing_versions,
+    post_versions,
+    version_key,
+    versions_condition,
+)
+from .feed import FEED_CURSOR_KEYS
 from .forms import PostForm, CommentForm
+from .images import schedule_images
 from .models import Post, Group, User, Follow
+from .paginators import CURSOR_KEYS, CountingPaginator, CursorPaginator
+from . import querysets
+from .recommendations import get_suggestions
+from .search import search_posts
+from .services import change_following
+from .trending import TRENDING_POSTS
 
 
 NUMBER_OF_POSTS = 10
+NUMBER_OF_COMMENTS = 20
+COMMENT_CURSOR_KEYS = ('created', 'pk')
 
 
-def get_page(request, post_list):
-    paginator = Paginator(post_list, NUMBER_OF_POSTS)
+def get_page(request, post_list, cursor_keys=CURSOR_KEYS, count_key=None):
+    """Страница ленты; с ``count_key`` число постов берётся из кэша."""
+    if settings.POSTS_CURSOR_PAGINATION:
+        paginator = CursorPaginator(post_list, NUMBER_OF_POSTS, cursor_keys)
+        return paginator.get_page(request.GET.get('cursor'))
+    paginator = CountingPaginator(
+        post_list,
+        NUMBER_OF_POSTS,
+        count_key=count_key,
+        version_keys=listing_versions(request),
+    )
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
-@cache_page(20, key_prefix='index_page')
+def lazy_page(request, post_list, count_key):
+    """Страница ленты, которая загружается только при отрисовке:
+    тело ленты обычно берётся из кэша и постов не требует."""
+    return SimpleLazyObject(
+        lambda: get_page(request, post_list, count_key=count_key)
+    )
+
+
+def profile_versions(request, username):
+    author_id = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    if author_id is None:
+        return None
+    return [
+        version_key('index'),
+        version_key('follow', author_id),
+        *suggestions_versions(request),
+    ]
+
+
+def suggestions_versions(request):
+    if not request.user.is_authenticated:
+        return []
+    # Свои подписки сразу убирают авторов из рекомендаций,
+    # не дожидаясь пересчёта.
+    return [
+        version_key('suggestions'),
+        version_key('suggestions', request.user.pk),
+        version_key('follow', request.user.pk),
+    ]
+
+
 def index(request):
-    posts = Post.objects.all().select_related('author', 'group')
-    page_obj = get_page(request, posts)
     context = {
-        'page_obj': page_obj,
+        'page_obj': lazy_page(request, querysets.index_posts(), 'index'),
+        'cache_versions': listing_versions(request),
     }
     return render(request, 'posts/index.html', context)
 
 
+def trending(request):
+    context = {
+        'posts': querysets.trending_posts()[:TRENDING_POSTS],
+        'cache_versions': [version_key('trending'), version_key('index')],
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+@versions_condition(listing_versions, per_user=True)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all().select_related('author')
-    page_obj = get_page(request, posts)
     context = {
         'group': group,
-        'page_obj': page_obj,
+        'page_obj': lazy_page(
+            request, querysets.group_posts(group), f'group:{group.pk}'
+        ),
+        'cache_versions': listing_versions(request),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@versions_condition(profile_versions, per_user=True)
 def profile(request, username):
     author = get_object_or_404(
-        User.objects.prefetch_related('posts'),
+        User.objects.select_related('stats'),
         username=username
     )
     following = False
+    suggestions = ()
     if request.user.is_authenticated:
         following = Follow.objects.filter(
             user=request.user,
             author=author
         ).exists()
-    page_obj = get_page(request, author.posts.all())
+        suggestions = get_suggestions(request.user)
     context = {
         'author': author,
-        'page_obj': page_obj,
+        'suggestions': suggestions,
+        'page_obj': lazy_page(
+            request, querysets.author_posts(author), f'author:{author.pk}'
+        ),
         'following': following,
+        'cache_versions': listing_versions(request),
     }
     return render(request, 'posts/profile.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    paginator = CountingPaginator(search_posts(query), NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@versions_condition(post_versions, per_user=True)
 def post_detail(request, post_id):
     post = get_object_or_404(
-        Post.objects.select_related('author', 'group'), id=post_id
+        Post.objects.select_related('author__stats', 'group'), id=post_id
     )
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    paginator = CursorPaginator(
+        querysets.post_comments(post),
+        NUMBER_OF_COMMENTS,
+        COMMENT_CURSOR_KEYS,
+    )
+    comments_cursor = request.GET.get('comments')
+    # Первая страница комментариев берётся из кэша шаблона,
+    # поэтому запрос к базе выполняется только при отрисовке.
+    comments = SimpleLazyObject(lambda: paginator.get_page(comments_cursor))
     context = {
         'post': post,
         'form': form,
         'comments': comments,
+        'comments_cursor': comments_cursor,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@transaction.atomic
 def post_create(request):
     group = Group.objects.all()
     if request.method == 'POST':
@@ -83,6 +180,7 @@ def post_create(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            schedule_images(post)
             return redirect('posts:profile', post.author.username)
     else:
         form = PostForm()
@@ -105,7 +203,13 @@ def post_edit(request, post_id):
             if form.is_valid():
                 post = form.save(commit=False)
                 post.author = request.user
+                image_changed = 'image' in form.changed_data
+                if image_changed:
+                    post.thumbnails = ''
+                    post.image_variants = ''
                 post.save()
+                if image_changed:
+                    schedule_images(post)
                 return redirect('posts:post_detail', post_id)
         else:
             form = PostForm(instance=post)
@@ -117,6 +221,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -130,33 +235,25 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_ids = request.user.follower.values_list('author__posts', flat=True)
-    post_list = Post.objects.filter(id__in=post_ids).all()
-    page_obj = get_page(request, post_list)
+    page_obj = get_page(
+        request, querysets.follow_posts(request.user), FEED_CURSOR_KEYS
+    )
     context = {
         'page_obj': page_obj,
+        'suggestions': get_suggestions(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    user = request.user
-    author = get_object_or_404(User, username=username)
-    if request.user != author:
-        Follow.objects.get_or_create(
-            user=user,
-            author=author,
-        )
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    change_following(request.user, follow=[author.pk])
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    user = request.user
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(
-        user=user,
-        author=author,
-    ).delete()
+    author = get_object_or_404(User.objects.only('pk'), username=username)
+    change_following(request.user, unfollow=[author.pk])
     return redirect('posts:profile', username)
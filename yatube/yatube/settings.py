@@ -1,5 +1,6 @@
 
 import os
+import tempfile
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -24,6 +25,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -34,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,7 +52,7 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -65,12 +69,67 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# sqlite - файл SQLite в режиме WAL, server - сервер базы данных
+# (по умолчанию PostgreSQL) с постоянными соединениями.
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'sqlite')
 DATABASES = {
     'default': {
+        'sqlite': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv(
+                'SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')
+            ),
+            # Сколько секунд ждать блокировку записи, прежде чем упасть
+            # с "database is locked".
+            'OPTIONS': {'timeout': 20},
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+        },
+        'server': {
+            'ENGINE': os.getenv(
+                'DB_ENGINE', 'django.db.backends.postgresql'
+            ),
+            'NAME': os.getenv('DB_NAME', 'yatube'),
+            'USER': os.getenv('DB_USER', 'yatube'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', ''),
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 600)),
+        },
+    }[DATABASE_PROFILE],
+}
+# Прагмы каждого соединения SQLite: WAL не даёт записи блокировать
+# чтение, synchronous=NORMAL в WAL не теряет целостность при сбое,
+# mmap и кэш страниц (отрицательный cache_size - в КиБ) сокращают чтения
+# с диска.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+# Проверять постоянные соединения в начале каждого запроса.
+DATABASE_HEALTH_CHECKS = os.getenv(
+    'DATABASE_HEALTH_CHECKS', 'True'
+).lower() == 'true'
+
+# Реплики только для чтения: пути к копиям базы SQLite через запятую.
+# Поддерживать копии в актуальном состоянии должна репликация вне Django.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1
+):
+    DATABASES[f'replica_{number}'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'NAME': path,
+        'OPTIONS': {'timeout': 20},
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 60)),
+        'TEST': {'MIRROR': 'default'},
     }
-}
+    DATABASE_REPLICAS.append(f'replica_{number}')
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Столько секунд после записи браузер читает из основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 10))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -111,14 +170,71 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@yatube.local')
+# Не больше стольких писем в секунду при рассылке дайджестов.
+EMAIL_RATE_LIMIT = float(os.getenv('EMAIL_RATE_LIMIT', 10))
+# Адрес сайта для ссылок в письмах.
+SITE_URL = os.getenv('SITE_URL', 'http://127.0.0.1:8000')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Миниатюры картинок постов, которые готовятся сразу после загрузки.
+POST_THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+# 0 - готовить миниатюры прямо в запросе.
+THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))
+
+# Варианты картинок для srcset: ширины, пропорции карточки и форматы
+# в порядке предпочтения (недоступные в сборке Pillow пропускаются).
+POST_IMAGE_VARIANT_WIDTHS = (480, 960, 1440)
+POST_IMAGE_VARIANT_RATIO = 960 / 339
+POST_IMAGE_VARIANT_FORMATS = ('avif', 'webp', 'jpeg')
+# 0 - кодировать варианты в том же процессе.
+IMAGE_VARIANT_PROCESSES = int(os.getenv('IMAGE_VARIANT_PROCESSES', 2))
+
+# Выполнять фоновые задачи сразу при постановке. Без этого их
+# выполняет отдельный процесс: python manage.py run_tasks.
+TASKS_EAGER = os.getenv('TASKS_EAGER', 'True').lower() == 'true'
+
+POSTS_CURSOR_PAGINATION = os.getenv(
+    'POSTS_CURSOR_PAGINATION', 'False'
+).lower() == 'true'
+
+# local - LocMemCache процесса, shared - общий для всех процессов кэш
+# (SQLite-файл или Redis при заданном REDIS_URL), tiered - local перед shared.
+CACHE_PROFILE = os.getenv('CACHE_PROFILE', 'local' if DEBUG else 'tiered')
+CACHE_LOCATION = os.getenv(
+    'CACHE_LOCATION', os.path.join(tempfile.gettempdir(), 'yatube_cache.db')
+)
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': CACHE_LOCATION,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+
 CACHES = {
-    'default': {
+    'local': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'shared': SHARED_CACHE,
 }
+CACHES['default'] = {
+    'local': CACHES['local'],
+    'shared': SHARED_CACHE,
+    'tiered': {
+        'BACKEND': 'core.cache.TieredCache',
+        'OPTIONS': {'L1': 'local', 'L2': 'shared', 'L1_TIMEOUT': 5},
+    },
+}[CACHE_PROFILE]